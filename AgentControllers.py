@@ -384,16 +384,20 @@ class BasicItemProducer:
 			#This business is currently under liquidation
 			#Check if liquidation is complete. If so, commit suicide
 			allItemsLiquidated = True
-			for itemId in self.agent.inventory:
-				itemContainer = self.agent.inventory[itemId]
-				self.logger.debug("Remainging inventory: {}".format(itemContainer))
-				if (itemContainer.quantity <= 0.01):
-					self.agent.consumeItem(itemContainer)
-					self.agent.removeItemListing(ItemListing(sellerId=self.agentId, itemId=itemId, unitPrice=0, maxQuantity=0))
-				else:
-					if ((self.agent.stepNum-self.updateOffset)%self.updateRate == 0):
-						self.liquidateItem(itemContainer)
-					allItemsLiquidated = False
+			self.agent.holdOutbound()  #Coalesce listing updates with the next packet sent. liquidateItem's market sample flushes them
+			try:
+				for itemId in self.agent.inventory:
+					itemContainer = self.agent.inventory[itemId]
+					self.logger.debug("Remainging inventory: {}".format(itemContainer))
+					if (itemContainer.quantity <= 0.01):
+						self.agent.consumeItem(itemContainer)
+						self.agent.removeItemListing(ItemListing(sellerId=self.agentId, itemId=itemId, unitPrice=0, maxQuantity=0))
+					else:
+						if ((self.agent.stepNum-self.updateOffset)%self.updateRate == 0):
+							self.liquidateItem(itemContainer)
+						allItemsLiquidated = False
+			finally:
+				self.agent.flushOutbound()
 
 			if (allItemsLiquidated):
 				self.logger.info("Completed business liquidation. Commiting suicide")
@@ -913,8 +917,12 @@ class BasicItemProducer:
 
 		#Sell all inventory
 		self.logger.info("Liquidating inventory")
-		for itemId in self.agent.inventory:
-			self.liquidateItem(self.agent.inventory[itemId])
+		self.agent.holdOutbound()
+		try:
+			for itemId in self.agent.inventory:
+				self.liquidateItem(self.agent.inventory[itemId])
+		finally:
+			self.agent.flushOutbound()
 
 		self.closingBusiness = True
 
@@ -946,8 +954,8 @@ class BasicItemProducer:
 		utils.createFolderPath(outputPath)
 
 		self.logger.info("saveCheckpoint() Saving checkpoint to \"{}\"".format(outputPath))
-		with open(outputPath, "wb") as pickleFile:
-			pickle.dump(checkpointObj, pickleFile)
+		with open(outputPath, "wb", buffering=1<<20) as pickleFile:
+			pickle.dump(checkpointObj, pickleFile, protocol=pickle.HIGHEST_PROTOCOL)
 
 	def loadCheckpoint(self, filePath=None):
 		'''
@@ -973,7 +981,7 @@ class BasicItemProducer:
 		try:
 			self.logger.info("loadCheckpoint() Trying to load checkpoint \"{}\"".format(checkpointFilePath))
 			checkpointObj = None
-			with open(checkpointFilePath, "rb") as pickleFile:
+			with open(checkpointFilePath, "rb", buffering=1<<20) as pickleFile:
 				checkpointObj = pickle.load(pickleFile)
 
 			if (checkpointObj):
@@ -983,8 +991,8 @@ class BasicItemProducer:
 					raise ValueError("Loaded pickle was tpye \"{}\"".format(type(checkpointObj)))
 			else:
 				raise ValueError("Loaded pickle was None")
-		except:
-			self.logger.error("Error while loading checkpoint\n{}".format(traceback.format_exc()))
+		except Exception:
+			self.logger.error("Error while loading checkpoint", exc_info=True)
 			return False
 
 		self.logger.debug("loadCheckpoint() succeeded")
@@ -1264,16 +1272,20 @@ class AIItemProducer:
 			#This business is currently under liquidation
 			#Check if liquidation is complete. If so, commit suicide
 			allItemsLiquidated = True
-			for itemId in self.agent.inventory:
-				itemContainer = self.agent.inventory[itemId]
-				self.logger.debug("Remainging inventory: {}".format(itemContainer))
-				if (itemContainer.quantity <= 0.01):
-					self.agent.consumeItem(itemContainer)
-					self.agent.removeItemListing(ItemListing(sellerId=self.agentId, itemId=itemId, unitPrice=0, maxQuantity=0))
-				else:
-					if ((self.agent.stepNum-self.updateOffset)%self.updateRate == 0):
-						self.liquidateItem(itemContainer)
-					allItemsLiquidated = False
+			self.agent.holdOutbound()  #Coalesce listing updates with the next packet sent. liquidateItem's market sample flushes them
+			try:
+				for itemId in self.agent.inventory:
+					itemContainer = self.agent.inventory[itemId]
+					self.logger.debug("Remainging inventory: {}".format(itemContainer))
+					if (itemContainer.quantity <= 0.01):
+						self.agent.consumeItem(itemContainer)
+						self.agent.removeItemListing(ItemListing(sellerId=self.agentId, itemId=itemId, unitPrice=0, maxQuantity=0))
+					else:
+						if ((self.agent.stepNum-self.updateOffset)%self.updateRate == 0):
+							self.liquidateItem(itemContainer)
+						allItemsLiquidated = False
+			finally:
+				self.agent.flushOutbound()
 
 			if (allItemsLiquidated):
 				self.logger.info("Completed business liquidation. Commiting suicide")
@@ -1884,8 +1896,12 @@ class AIItemProducer:
 
 		#Sell all inventory
 		self.logger.info("Liquidating inventory")
-		for itemId in self.agent.inventory:
-			self.liquidateItem(self.agent.inventory[itemId])
+		self.agent.holdOutbound()
+		try:
+			for itemId in self.agent.inventory:
+				self.liquidateItem(self.agent.inventory[itemId])
+		finally:
+			self.agent.flushOutbound()
 
 		self.closingBusiness = True
 
@@ -1917,8 +1933,8 @@ class AIItemProducer:
 		utils.createFolderPath(outputPath)
 
 		self.logger.info("saveCheckpoint() Saving checkpoint to \"{}\"".format(outputPath))
-		with open(outputPath, "wb") as pickleFile:
-			pickle.dump(checkpointObj, pickleFile)
+		with open(outputPath, "wb", buffering=1<<20) as pickleFile:
+			pickle.dump(checkpointObj, pickleFile, protocol=pickle.HIGHEST_PROTOCOL)
 
 	def loadCheckpoint(self, filePath=None):
 		'''
@@ -1944,7 +1960,7 @@ class AIItemProducer:
 		try:
 			self.logger.info("loadCheckpoint() Trying to load checkpoint \"{}\"".format(checkpointFilePath))
 			checkpointObj = None
-			with open(checkpointFilePath, "rb") as pickleFile:
+			with open(checkpointFilePath, "rb", buffering=1<<20) as pickleFile:
 				checkpointObj = pickle.load(pickleFile)
 
 			if (checkpointObj):
@@ -1954,8 +1970,8 @@ class AIItemProducer:
 					raise ValueError("Loaded pickle was tpye \"{}\"".format(type(checkpointObj)))
 			else:
 				raise ValueError("Loaded pickle was None")
-		except:
-			self.logger.error("Error while loading checkpoint\n{}".format(traceback.format_exc()))
+		except Exception:
+			self.logger.error("Error while loading checkpoint", exc_info=True)
 			return False
 
 		self.logger.debug("loadCheckpoint() succeeded")
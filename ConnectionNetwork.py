@@ -14,6 +14,8 @@ The network will route any packet with a valid destination, regardless of conten
 '''
 import multiprocessing
 import threading
+import logging
+import collections
 import hashlib
 import time
 import traceback
@@ -26,6 +28,18 @@ from Marketplace import *
 from StatisticsGatherer import *
 
 
+#Packet types that are handled by the network itself instead of being routed straight to their destination. Mirrors the checks in ConnectionNetwork.monitorLink
+g_NetworkHandledPacketTypes = frozenset([
+	PACKET_TYPE.BATCH, PACKET_TYPE.KILL_PIPE_NETWORK, PACKET_TYPE.SNOOP_START, PACKET_TYPE.TICK_BLOCK_SUBSCRIBE, PACKET_TYPE.TICK_BLOCKED,
+	PACKET_TYPE.KILL_ALL_BROADCAST, PACKET_TYPE.INFO_REQ_BROADCAST, PACKET_TYPE.CONTROLLER_START_BROADCAST, PACKET_TYPE.CONTROLLER_MSG_BROADCAST,
+	PACKET_TYPE.TICK_GRANT_BROADCAST, PACKET_TYPE.SAVE_CHECKPOINT_BROADCAST, PACKET_TYPE.LOAD_CHECKPOINT_BROADCAST,
+	PACKET_TYPE.ITEM_MARKET_UPDATE, PACKET_TYPE.ITEM_MARKET_REMOVE, PACKET_TYPE.ITEM_MARKET_SAMPLE, PACKET_TYPE.ITEM_MARKET_SAMPLE_ACK,
+	PACKET_TYPE.LABOR_MARKET_UPDATE, PACKET_TYPE.LABOR_MARKET_REMOVE, PACKET_TYPE.LABOR_MARKET_SAMPLE, PACKET_TYPE.LABOR_MARKET_SAMPLE_ACK,
+	PACKET_TYPE.LAND_MARKET_UPDATE, PACKET_TYPE.LAND_MARKET_REMOVE, PACKET_TYPE.LAND_MARKET_SAMPLE, PACKET_TYPE.LAND_MARKET_SAMPLE_ACK,
+	PACKET_TYPE.PRODUCTION_NOTIFICATION, PACKET_TYPE.INFO_RESP
+])
+
+
 class ConnectionNetwork:
 	def __init__(self, itemDict, simManagerId=None, logFile=True, logLevel="INFO", outputDir="OUTPUT", simulationSettings={}):
 		self.id = "ConnectionNetwork"
@@ -35,10 +49,12 @@ class ConnectionNetwork:
 		#self.logger = utils.getLogger("{}".format(__name__), logFile=logFile, outputdir=os.path.join(outputDir, "LOGS"), fileLevel=logLevel)   #This causes a serious performance hit. Only enable it if you REALLY need to
 		self.logger = utils.getLogger("{}".format(__name__), logFile=logFile, outputdir=os.path.join(outputDir, "LOGS"), fileLevel="INFO")
 		self.lockTimeout = 10
+		self.debugLogging = self.logger.isEnabledFor(logging.DEBUG)  #Skip formatting per-packet debug messages when they won't be emitted
 
 		self.agentConnections = {}
 		self.agentConnectionsLock = threading.Lock()
 		self.sendLocks = {}
+		self.batchConnections = set()  #Connections that can unpack BATCH packets
 
 		self.snoopDict = {}
 		self.snoopDictLock = threading.Lock()
@@ -63,10 +79,12 @@ class ConnectionNetwork:
 		#Keep track of spawned threads
 		self.spawnedThreads = []
 
-	def addConnection(self, agentId, networkLink):
+	def addConnection(self, agentId, networkLink, acceptsBatches=False):
 		self.logger.info("Adding connection to {}".format(agentId))
 		self.agentConnections[agentId] = networkLink
 		self.sendLocks[agentId] = threading.Lock()
+		if (acceptsBatches):
+			self.batchConnections.add(agentId)
 
 	def addMarketplace(self, marketType, marketDict=None):
 		#Instantiate communication pipes
@@ -112,14 +130,16 @@ class ConnectionNetwork:
 			monitorThread.start()
 
 	def sendPacket(self, pipeId, packet):
-		self.logger.debug("ConnectionNetwork.sendPacket({}, {}) start".format(pipeId, packet))
+		if (self.debugLogging):
+			self.logger.debug("ConnectionNetwork.sendPacket({}, {}) start".format(pipeId, packet))
 		try:
 			if (pipeId in self.agentConnections):
 				self.logger.debug("Requesting lock sendLocks[{}]".format(pipeId))
 				acquired_sendLock = self.sendLocks[pipeId].acquire()
 				if (acquired_sendLock):
 					self.logger.debug("Acquired lock sendLocks[{}]".format(pipeId))
-					self.logger.debug("OUTBOUND {} {}".format(packet, pipeId))
+					if (self.debugLogging):
+						self.logger.debug("OUTBOUND {} {}".format(packet, pipeId))
 					self.agentConnections[pipeId].sendPipe.send(packet)
 					self.sendLocks[pipeId].release()
 					self.logger.debug("Release lock sendLocks[{}]".format(pipeId))
@@ -154,12 +174,22 @@ class ConnectionNetwork:
 
 	def monitorLink(self, agentId):
 		agentLink = self.agentConnections[agentId]
+		batchedPackets = collections.deque()
 		while True:
 			self.logger.debug("Monitoring {} link {}".format(agentId, agentLink))
-			incommingPacket = agentLink.recvPipe.recv()
-			self.logger.debug("INBOUND {} {}".format(agentId, incommingPacket))
+			if (len(batchedPackets) > 0):
+				incommingPacket = batchedPackets.popleft()
+			else:
+				incommingPacket = agentLink.recvPipe.recv()
+			if (self.debugLogging):
+				self.logger.debug("INBOUND {} {}".format(agentId, incommingPacket))
 			destinationId = incommingPacket.destinationId
 
+			#Unpack batched packets. Packets are routed in order; runs of agent-bound packets are forwarded together, the rest are handled here before we read from the pipe again
+			if (incommingPacket.msgType == PACKET_TYPE.BATCH):
+				self.routeBatch(incommingPacket, batchedPackets)
+				continue
+
 			#Handle kill packets
 			if (incommingPacket.msgType == PACKET_TYPE.KILL_PIPE_NETWORK):
 				#We've received a kill command for this pipe. Remove destPipe from connections, then kill this monitor thread
@@ -311,6 +341,53 @@ class ConnectionNetwork:
 				self.sendPacket(agentId, responsePacket)
 
 
+	def routeBatch(self, batchPacket, networkPackets):
+		'''
+		Forwards the packets of a BATCH in order, coalescing consecutive runs of packets going to the same destinations into a single BATCH packet per destination.
+		When we reach a packet the network has to handle itself, or whose destination can't unpack a BATCH, the pending destination groups are flushed first.
+		That packet and the rest of the batch are then pushed to the front of networkPackets, so they are handled in order before we read from the pipe again
+		'''
+		packets = batchPacket.payload
+		destinationBatches = {}
+		for packetIndex in range(len(packets)):
+			packet = packets[packetIndex]
+			destinationId = packet.destinationId
+			if (packet.msgType in g_NetworkHandledPacketTypes) or (not destinationId in self.batchConnections) or (not destinationId in self.agentConnections):
+				self.sendDestinationBatches(destinationBatches)
+
+				remainingPackets = packets[packetIndex+1:]
+				if (len(remainingPackets) > 0):
+					networkPackets.appendleft(NetworkPacket(senderId=batchPacket.senderId, destinationId=batchPacket.destinationId, msgType=PACKET_TYPE.BATCH, payload=remainingPackets))
+				networkPackets.appendleft(packet)
+				return
+			elif (destinationId in destinationBatches):
+				destinationBatches[destinationId].append(packet)
+			else:
+				destinationBatches[destinationId] = [packet]
+
+		self.sendDestinationBatches(destinationBatches)
+
+
+	def sendDestinationBatches(self, destinationBatches):
+		'''
+		Sends each destination's group of packets, as a single BATCH packet if there is more than one
+		'''
+		for destinationId in destinationBatches:
+			destinationPackets = destinationBatches[destinationId]
+			if (len(destinationPackets) == 1):
+				self.sendPacket(destinationId, destinationPackets[0])
+			else:
+				batchPacket = NetworkPacket(senderId=self.id, destinationId=destinationId, msgType=PACKET_TYPE.BATCH, payload=destinationPackets)
+				self.sendPacket(destinationId, batchPacket)
+
+			#Check for active snoops
+			for packet in destinationPackets:
+				if (packet.msgType in self.snoopDict):
+					snoopThread = threading.Thread(target=self.statsGatherer.handleSnoop, args=(packet,))
+					snoopThread.start()
+					self.spawnedThreads.append(snoopThread)
+
+
 	def monitorTickBlockers(self):
 		self.logger.info("monitorTickBlockers() start")
 
@@ -36,10 +36,13 @@ import random
 import multiprocessing
 import copy
 import queue
+import collections
+import itertools
+import heapq
+import operator
 import numpy as np
 from sortedcontainers import SortedList
 import pickle
-import traceback
 
 from NetworkClasses import *
 from TestControllers import *
@@ -56,9 +59,50 @@ class UtilityFunction:
 	'''
 	Determines the utility for an object
 	'''
+	__slots__ = ("baseUtility", "diminishingFactor", "logTotalUtility", "totalUtilityExponent", "totalUtilityScale", "marginalUtilityCache", "totalUtilityCache")  #Every agent has one of these per item, so skip the per-instance __dict__
+	maxCacheSize = 1024  #Utility caches are cleared once they hold this many quantities
+
 	def __init__(self, baseUtility, baseStdDev, diminishingFactor, diminStdDev):
-		self.baseUtility = float(utils.getNormalSample(baseUtility, baseStdDev))
-		self.diminishingFactor = float(utils.getNormalSample(diminishingFactor, diminStdDev))
+		self.setParams(utils.getNormalSample(baseUtility, baseStdDev), utils.getNormalSample(diminishingFactor, diminStdDev))
+
+	@classmethod
+	def fromParams(cls, baseUtility, diminishingFactor):
+		'''
+		Returns a UtilityFunction with the given B and D, for callers that have already sampled them
+		'''
+		utilityFunction = cls.__new__(cls)
+		utilityFunction.setParams(baseUtility, diminishingFactor)
+		return utilityFunction
+
+	def setParams(self, baseUtility, diminishingFactor):
+		'''
+		Sets B and D, and the values derived from them
+		'''
+		self.baseUtility = float(baseUtility)
+		self.diminishingFactor = float(diminishingFactor)
+
+		#Constants of the total utility integral. See getTotalUtility
+		self.logTotalUtility = (self.diminishingFactor == 1)
+		self.totalUtilityExponent = 1-self.diminishingFactor
+		self.totalUtilityScale = 0
+		if not (self.logTotalUtility):
+			self.totalUtilityScale = self.baseUtility / self.totalUtilityExponent
+
+		#B and D never change, so utilities can be memoized by quantity
+		self.marginalUtilityCache = {}
+		self.totalUtilityCache = {}
+
+	def __getstate__(self):
+		#Everything else is derived from B and D, and is rebuilt by __setstate__
+		return {"baseUtility": self.baseUtility, "diminishingFactor": self.diminishingFactor}
+
+	def __setstate__(self, state):
+		'''
+		Restores a pickled UtilityFunction. Pickles from before __slots__ was added hold a plain dict without the utility caches (or the
+		integral constants), and slot-only pickles hold a (None, slotDict) tuple, so only B and D are read and everything else is rebuilt
+		'''
+		state = utils.getPickledStateDict(state)
+		self.setParams(state["baseUtility"], state["diminishingFactor"])
 
 	def getMarginalUtility(self, quantity):
 		'''
@@ -70,7 +114,13 @@ class UtilityFunction:
 
 		The marginal utility curve for any given agent can be represented by B and D.
 		'''
-		marginalUtility = self.baseUtility / (pow(quantity+1, self.diminishingFactor))
+		marginalUtility = self.marginalUtilityCache.get(quantity)
+		if (marginalUtility is None):
+			marginalUtility = self.baseUtility / (pow(quantity+1, self.diminishingFactor))
+			if (len(self.marginalUtilityCache) >= self.maxCacheSize):
+				self.marginalUtilityCache.clear()
+			self.marginalUtilityCache[quantity] = marginalUtility
+
 		return marginalUtility
 
 	def getTotalUtility(self, quantity):
@@ -90,13 +140,41 @@ class UtilityFunction:
 		if (quantity == 0):
 			return 0
 
-		if (self.diminishingFactor == 1):
-			totalUtility = (self.baseUtility * math.log(quantity)) + self.baseUtility
-		else:
-			totalUtility = ((self.baseUtility * (pow(quantity, 1-self.diminishingFactor) - 1)) / (1-self.diminishingFactor)) + self.baseUtility
+		totalUtility = self.totalUtilityCache.get(quantity)
+		if (totalUtility is None):
+			if (self.logTotalUtility):
+				totalUtility = (self.baseUtility * math.log(quantity)) + self.baseUtility
+			else:
+				totalUtility = (self.totalUtilityScale * (pow(quantity, self.totalUtilityExponent) - 1)) + self.baseUtility
+
+			if (len(self.totalUtilityCache) >= self.maxCacheSize):
+				self.totalUtilityCache.clear()
+			self.totalUtilityCache[quantity] = totalUtility
 
 		return totalUtility
 
+	def getMarginalUtilities(self, quantities):
+		'''
+		Vectorized getMarginalUtility. Returns a numpy array with the marginal utility for each quantity in quantities
+		'''
+		quantityArray = np.asarray(quantities, dtype=np.float64)
+		return self.baseUtility / np.power(quantityArray+1, self.diminishingFactor)
+
+	def getTotalUtilities(self, quantities):
+		'''
+		Vectorized getTotalUtility. Returns a numpy array with the total utility for each quantity in quantities
+		'''
+		quantityArray = np.asarray(quantities, dtype=np.float64)
+		totalUtilities = np.zeros(quantityArray.shape)
+		nonZero = (quantityArray != 0)
+
+		if (self.logTotalUtility):
+			totalUtilities[nonZero] = (self.baseUtility * np.log(quantityArray[nonZero])) + self.baseUtility
+		else:
+			totalUtilities[nonZero] = (self.totalUtilityScale * (np.power(quantityArray[nonZero], self.totalUtilityExponent) - 1)) + self.baseUtility
+
+		return totalUtilities
+
 	def __str__(self):
 		return "UF(BaseUtility: {}, DiminishingFactor: {})".format(self.baseUtility, self.diminishingFactor)
 
@@ -260,18 +338,12 @@ class ProductionFunction:
 
 		#Determine our theoretical labor availability per step
 		agent.laborContractsLock.acquire()
-		tempLaborContracts = copy.deepcopy(agent.laborContracts)
+		laborContractsList = list(copy.deepcopy(agent.laborContracts).values())
 		agent.laborContractsLock.release()
-		laborContractsList =  []
-		for endStep in tempLaborContracts:
-			for contractHash in tempLaborContracts[endStep]:
-				laborContractsList.append(tempLaborContracts[endStep][contractHash])
 
 		theorLaborInventory = {}
 		for contract in laborContractsList:
-			if not (contract.workerSkillLevel in theorLaborInventory):
-				theorLaborInventory[contract.workerSkillLevel] = 0
-			theorLaborInventory[contract.workerSkillLevel] += contract.ticksPerStep
+			theorLaborInventory[contract.workerSkillLevel] = theorLaborInventory.get(contract.workerSkillLevel, 0) + contract.ticksPerStep
 
 		#Calculate fixed labor deficits
 		availableSkillLevels = [i for i in theorLaborInventory.keys()]
@@ -795,10 +867,9 @@ class NutritionTracker:
 			((self.targetFat-self.avgFat)/self.targetFat)+1])
 
 		#Get dictionary of food marginal utility
-		foodMarginalUtil = {}
-		for foodId in self.nutritionalDict:
-			marginalUtility = self.agent.getMarginalUtility(foodId)
-			foodMarginalUtil[foodId] = marginalUtility * pow((self.targetCalories/self.avgCalories), 3)  #Sale the utility of food with hunger level
+		foodIds = list(self.nutritionalDict.keys())
+		foodMarginalUtilities = self.agent.getMarginalUtilities(foodIds) * pow((self.targetCalories/self.avgCalories), 3)  #Sale the utility of food with hunger level
+		foodMarginalUtil = dict(zip(foodIds, foodMarginalUtilities.tolist()))
 
 		#Iteratively approach meal plan that closely meets deficits while maximizing net utility
 		mealPlan = {}
@@ -832,6 +903,7 @@ class NutritionTracker:
 
 				#Get net utility of this food
 				unitPrice = foodUnitPrices[foodId]
+				marginalUtility = foodMarginalUtil[foodId]
 				netUtil = marginalUtility-unitPrice
 				if (netUtil <= 0):
 					netUtil = (marginalUtility/unitPrice)
@@ -982,16 +1054,19 @@ class LandAllocationQueue:
 		Will decrement the waiting time for each allocation entry.
 		When an entry is done, it will be removed from the queue and allocated in the agent's land holdings
 		'''
-		newQueue = []
+		if (len(self.queue) == 0):
+			#Nothing is being allocated
+			return
 
-		while (len(self.queue) > 0):
-			allocationEntry = self.queue.pop(0)
-			allocationEntry["ticksNeeded"] -= ticks
+		#Advance the whole queue under one landHoldingsLock acquisition. This also keeps startAllocation from appending while we rebuild the queue
+		acquired_landHoldingsLock = self.agent.landHoldingsLock.acquire(timeout=self.agent.lockTimeout)
+		if (acquired_landHoldingsLock):
+			newQueue = []
+			for allocationEntry in self.queue:
+				allocationEntry["ticksNeeded"] -= ticks
 
-			if (allocationEntry["ticksNeeded"] <= 0):
-				#This land is ready to be fully allocated
-				acquired_landHoldingsLock = self.agent.landHoldingsLock.acquire(timeout=self.agent.lockTimeout)
-				if (acquired_landHoldingsLock):
+				if (allocationEntry["ticksNeeded"] <= 0):
+					#This land is ready to be fully allocated
 					self.logger.debug("{} has finished allocating".format(allocationEntry))
 
 					hectares = allocationEntry["hectares"]
@@ -1001,86 +1076,90 @@ class LandAllocationQueue:
 					if not (allocationType in self.agent.landHoldings):
 						self.agent.landHoldings[allocationType] = 0
 					self.agent.landHoldings[allocationType] += hectares
-
-					self.agent.landHoldingsLock.release()
 				else:
-					self.logger.error("LandAllocationQueue.useTimeTicks({}) Lock landHoldingsLock acquisition timout".format(ticks))
-			else:
-				#This land is not yet ready to be fully allocated
-				newQueue.append(allocationEntry)
+					#This land is not yet ready to be fully allocated
+					newQueue.append(allocationEntry)
 
-		self.queue = newQueue
+			self.queue = newQueue
+			self.agent.landHoldingsLock.release()
+		else:
+			self.logger.error("LandAllocationQueue.useTimeTicks({}) Lock landHoldingsLock acquisition timout".format(ticks))
 
 
 class AgentInfo:
+	__slots__ = ("agentId", "agentType")
+
 	def __init__(self, agentId, agentType):
 		self.agentId = agentId
 		self.agentType = agentType
 
+	def __setstate__(self, state):
+		#Pickles from before __slots__ was added hold a plain dict
+		utils.setSlotState(self, state)
+
 	def __str__(self):
 		return "AgentInfo(ID={}, Type={})".format(self.agentId, self.agentType)
 
 
-def getAgentController(agent, settings={}, logFile=True, fileLevel="INFO", outputDir="OUTPUT"):
-	'''
-	Instantiates an agent controller, dependant on the agentType
-	'''
-	agentInfo = agent.info
-
+#Maps agentType to the controller class used for it
+g_AgentControllerTypes = {
 	#Normal agent controllers
-	if (agentInfo.agentType == "FrugalWorker"):
-		return FrugalWorker(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "BasicItemProducer"):
-		return BasicItemProducer(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "AIItemProducer"):
-		return AIItemProducer(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
+	"FrugalWorker": FrugalWorker,
+	"BasicItemProducer": BasicItemProducer,
+	"AIItemProducer": AIItemProducer,
 
 	#Optimizers
-	if (agentInfo.agentType == "AITracker"):
-		return AITracker(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
+	"AITracker": AITracker,
 
 	#Test controllers
-	if (agentInfo.agentType == "PushoverController"):
-		return PushoverController(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestSnooper"):
-		return TestSnooper(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestSeller"):
-		return TestSeller(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestBuyer"):
-		return TestBuyer(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestEmployer"):
-		return TestEmployer(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestWorker"):
-		return TestWorker(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestLandSeller"):
-		return TestLandSeller(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestLandBuyer"):
-		return TestLandBuyer(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestEater"):
-		return TestEater(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestSpawner"):
-		return TestSpawner(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestEmployerCompetetive"):
-		return TestEmployerCompetetive(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestFarmWorker"):
-		return TestFarmWorker(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestFarmWorkerV2"):
-		return TestFarmWorkerV2(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestFarmCompetetive"):
-		return TestFarmCompetetive(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestFarmCompetetiveV2"):
-		return TestFarmCompetetiveV2(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestFarmCompetetiveV3"):
-		return TestFarmCompetetiveV3(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "DoNothingBlocker"):
-		return DoNothingBlocker(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
-	if (agentInfo.agentType == "TestFarmCompetetiveV4"):
-		return TestFarmCompetetiveV4(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
+	"PushoverController": PushoverController,
+	"TestSeller": TestSeller,
+	"TestBuyer": TestBuyer,
+	"TestEmployer": TestEmployer,
+	"TestWorker": TestWorker,
+	"TestLandSeller": TestLandSeller,
+	"TestLandBuyer": TestLandBuyer,
+	"TestEater": TestEater,
+	"TestSpawner": TestSpawner,
+	"TestEmployerCompetetive": TestEmployerCompetetive,
+	"TestFarmWorker": TestFarmWorker,
+	"TestFarmWorkerV2": TestFarmWorkerV2,
+	"TestFarmCompetetive": TestFarmCompetetive,
+	"TestFarmCompetetiveV2": TestFarmCompetetiveV2,
+	"TestFarmCompetetiveV3": TestFarmCompetetiveV3,
+	"DoNothingBlocker": DoNothingBlocker,
+	"TestFarmCompetetiveV4": TestFarmCompetetiveV4
+}
+
+
+def getAgentController(agent, settings={}, logFile=True, fileLevel="INFO", outputDir="OUTPUT"):
+	'''
+	Instantiates an agent controller, dependant on the agentType
+	'''
+	controllerType = g_AgentControllerTypes.get(agent.info.agentType)
+	if (controllerType):
+		return controllerType(agent, settings=settings, logFile=logFile, fileLevel=fileLevel, outputDir=outputDir)
 
 	#Unhandled agent type. Return default controller
 	return None
 
 
+def getSkillDistribution(settings={}):
+	'''
+	Returns the (alpha, beta) parameters of the agent skill level beta distribution
+	'''
+	alpha = 2  #Default alpha
+	beta = 5   #Default beta
+	if ("skillDistribution" in settings):
+		if ("alpha" in settings["skillDistribution"]):
+			alpha = settings["skillDistribution"]["alpha"]
+
+		if ("beta" in settings["skillDistribution"]):
+			beta = settings["skillDistribution"]["beta"]
+
+	return alpha, beta
+
+
 class AgentSeed:
 	'''
 	Because thread locks cannot be pickled, you can't pass Agent instances to other processes.
@@ -1088,10 +1167,11 @@ class AgentSeed:
 	So the AgentSeed class is a pickle-safe info container that can be passed to child processes.
 	The process can then call AgentSeed.spawnAgent() to instantiate an Agent obj.
 	'''
-	def __init__(self, agentId, agentType=None, ticksPerStep=24, settings={}, simManagerId=None, itemDict=None, allAgentDict=None, logFile=True, fileLevel="INFO", outputDir="OUTPUT", disableNetworkLink=False):
+	def __init__(self, agentId, agentType=None, ticksPerStep=24, settings={}, simManagerId=None, itemDict=None, allAgentDict=None, logFile=True, fileLevel="INFO", outputDir="OUTPUT", disableNetworkLink=False, skillLevel=None):
 		self.agentInfo = AgentInfo(agentId, agentType)
 		self.ticksPerStep = ticksPerStep
 		self.settings = settings
+		self.skillLevel = skillLevel  #If None, the agent samples its own skill level
 		self.simManagerId = simManagerId
 		self.itemDict = itemDict
 		self.allAgentDict = allAgentDict
@@ -1110,7 +1190,7 @@ class AgentSeed:
 			self.agentLink = Link(sendPipe=agentPipeSend, recvPipe=agentPipeRecv)
 
 	def spawnAgent(self):
-		return Agent(self.agentInfo, simManagerId=self.simManagerId, ticksPerStep=self.ticksPerStep, settings=self.settings, itemDict=self.itemDict, allAgentDict=self.allAgentDict, networkLink=self.agentLink, logFile=self.logFile, fileLevel=self.fileLevel, outputDir=self.outputDir)
+		return Agent(self.agentInfo, simManagerId=self.simManagerId, ticksPerStep=self.ticksPerStep, settings=self.settings, itemDict=self.itemDict, allAgentDict=self.allAgentDict, networkLink=self.agentLink, logFile=self.logFile, fileLevel=self.fileLevel, outputDir=self.outputDir, skillLevel=self.skillLevel)
 
 	def __str__(self):
 		return "AgentSeed({})".format(self.agentInfo)
@@ -1267,17 +1347,21 @@ class AgentCheckpoint:
 		agentObj.skillLevel = self.skillLevel
 
 		shiftedLaborContracts = {}  #Shift labor contract start and end times by checkpoint step time
-		for endStep in self.laborContracts:
-			shiftedEndStep = endStep - self.stepNum
-			shiftedLaborContracts[shiftedEndStep] = {}
-			for contractHash in self.laborContracts[endStep]:
-				laborContract = self.laborContracts[endStep][contractHash]
-				laborContract.startStep = laborContract.startStep - self.stepNum
-				laborContract.endStep = laborContract.endStep - self.stepNum
+		shiftedContractsByEndStep = {}
+		shiftedContractTicksByEndStep = {}
+		for contractHash in self.laborContracts:
+			laborContract = self.laborContracts[contractHash]
+			laborContract.startStep = laborContract.startStep - self.stepNum
+			laborContract.endStep = laborContract.endStep - self.stepNum
 
-				shiftedLaborContracts[shiftedEndStep][contractHash] = laborContract
+			shiftedLaborContracts[contractHash] = laborContract
+			shiftedContractsByEndStep.setdefault(laborContract.endStep, set()).add(contractHash)
+			shiftedContractTicksByEndStep[laborContract.endStep] = shiftedContractTicksByEndStep.get(laborContract.endStep, 0) + laborContract.ticksPerStep
 
 		agentObj.laborContracts = shiftedLaborContracts
+		agentObj.laborContractsByEndStep = shiftedContractsByEndStep
+		agentObj.laborContractExpiryHeap = sorted(shiftedContractsByEndStep.keys())  #A sorted list is a valid heap
+		agentObj.laborContractTicksByEndStep = shiftedContractTicksByEndStep
 
 		agentObj.laborContractsTotal = self.laborContractsTotal
 		agentObj.laborInventory = self.laborInventory
@@ -1293,7 +1377,12 @@ class AgentCheckpoint:
 		#Instantiate agent preferences (utility functions)
 		#agentObj.nutritionalDict = self.nutritionalDict
 		#agentObj.utilityFunctions = self.utilityFunctions
+		agentObj.updateUtilityArrays()  #Keep the utility arrays in sync with whatever utility functions the agent ends up with
 		agentObj.eating = self.eating
+		if (agentObj.eating):
+			agentObj.doneEatingEvent.clear()
+		else:
+			agentObj.doneEatingEvent.set()
 		agentObj.autoEatFlag = self.autoEatFlag
 
 		#Keep track of agent nutrition
@@ -1396,7 +1485,7 @@ class Agent:
 		-marketplace updates and polling
 
 	'''
-	def __init__(self, agentInfo, simManagerId=None, ticksPerStep=24, settings={}, itemDict=None, allAgentDict=None, networkLink=None, logFile=True, fileLevel="INFO", outputDir="OUTPUT", controller=None):
+	def __init__(self, agentInfo, simManagerId=None, ticksPerStep=24, settings={}, itemDict=None, allAgentDict=None, networkLink=None, logFile=True, fileLevel="INFO", outputDir="OUTPUT", controller=None, skillLevel=None):
 		self.info = agentInfo
 		self.agentId = agentInfo.agentId
 		self.agentType = agentInfo.agentType
@@ -1404,11 +1493,19 @@ class Agent:
 		self.simManagerId = simManagerId
 		self.outputDir = outputDir
 
+		#Default checkpoint location
+		self.checkpointFileName = "{}.{}.checkpoint.pickle".format(self.agentId, self.agentType)
+		self.checkpointFilePath = os.path.join(self.outputDir, "CHECKPOINT", self.checkpointFileName)
+		self.checkpointDirCreated = False
+
 		self.logger = utils.getLogger("{}:{}".format(__name__, self.agentId), console="ERROR", logFile=logFile, outputdir=os.path.join(outputDir, "LOGS", "Agent_Logs"), fileLevel=fileLevel)
 		self.logger.info("{} instantiated".format(self.info))
+		self.debugLogging = self.logger.isEnabledFor(logging.DEBUG)  #Agent log levels are fixed at instantiation, so this only needs to be checked once
+		self.infoLogging = self.logger.isEnabledFor(logging.INFO)
 
 		self.lockTimeout = 5
 		self.responsePollTime = 0.0001
+		self.responsePollMax = 0.05  #Cap on the exponential backoff between TICK_BLOCKED resends
 		self.agentKillFlag = False
 
 		self.itemDict = itemDict
@@ -1416,8 +1513,10 @@ class Agent:
 		#Pipe connections to the connection network
 		self.networkLink = networkLink
 		self.networkSendLock = threading.Lock()
-		self.responseBuffer = {}
-		self.responseBufferLock = threading.Lock()
+		self.sendQueue = collections.deque()  #Outbound packets waiting to be flushed to the network
+		self.outboundHold = threading.local()  #Packets a thread is holding back until flushOutbound(). See holdOutbound()
+		self.responseQueues = {}  #Response queue for each outstanding transaction, keyed by transactionId
+		self.transactionCounter = itertools.count()  #Unique sequence number for market sample transaction ids
 		self.outstandingTrades = {}
 		self.outstandingTradesLock = threading.Lock()
 
@@ -1445,29 +1544,26 @@ class Agent:
 		self.landAllocationQueue = LandAllocationQueue(self)
 
 		#Keep track of labor stuff
-		alpha = 2  #Default alpha
-		beta = 5   #Default beta
-		if ("skillDistribution" in settings):
-			if ("alpha" in settings["skillDistribution"]):
-				alpha = settings["skillDistribution"]["alpha"]
-
-			if ("beta" in settings["skillDistribution"]):
-				beta = settings["skillDistribution"]["beta"]
-
-		self.skillLevel = random.betavariate(alpha, beta)
-
-		self.laborContracts = {}
+		if (skillLevel is None):
+			#No pre-sampled skill level was provided, so sample our own
+			alpha, beta = getSkillDistribution(settings)
+			skillLevel = random.betavariate(alpha, beta)
+		self.skillLevel = skillLevel
+
+		self.laborContracts = {}  #Keyed by contract hash
+		self.laborContractsByEndStep = {}  #Set of contract hashes for each endStep
+		self.laborContractExpiryHeap = []  #Min-heap of the endSteps in laborContractsByEndStep
+		self.laborContractTicksByEndStep = {}  #Sum of ticksPerStep of the contracts in each laborContractsByEndStep bucket
 		self.laborContractsTotal = 0
 		self.laborContractsLock = threading.Lock()
 		self.fullfilledContracts = False
+		self.fullfilledContractsEvent = threading.Event()  #Set once this step's labor contracts have been fulfilled
 		self.laborInventory = {}  #Keep track of all the labor available to a firm for this step
 		self.laborInventoryLock = threading.Lock()
-		self.nextLaborInventory = {}  #Keep track of all the labor supplied to a firm for this step
+		self.nextLaborInventory = collections.defaultdict(int)  #Keep track of all the labor supplied to a firm for this step
 		self.nextLaborInventoryLock = threading.Lock()
-		self.commitedTicks = 0
-		self.commitedTicksLock = threading.Lock()
-		self.commitedTicks_nextStep = 0
-		self.commitedTicks_nextStepLock = threading.Lock()
+		self.commitedTicks = 0  #Guarded by laborContractsLock
+		self.commitedTicks_nextStep = 0  #Guarded by laborContractsLock
 
 		#Keep track of time ticks
 		self.timeTicks = 0
@@ -1476,21 +1572,45 @@ class Agent:
 		self.tickBlockFlag_Lock = threading.Lock()
 		self.stepNum = -1
 		self.ticksPerStep = ticksPerStep
+		self.tickBlockedPacket = NetworkPacket(senderId=self.agentId, msgType=PACKET_TYPE.TICK_BLOCKED)  #Sent every step when needTickBlockAck is False. Its fields never change, so it's only built once
+		self.listingPacketCache = {}  #Market update/remove packets keyed by (msgType, listingStr). See publishListing()
+		self.maxListingPacketCacheSize = 256
+		self.publishedItemListings = {}  #(unitPrice, maxQuantity) of the last item listing we sent to the market, keyed by itemId
+		self.publishedItemListingsLock = threading.Lock()
 		
 		#Instantiate agent preferences (utility functions)
 		self.nutritionalDict = {}
 		self.utilityFunctions = {}
+		self.utilityItemIndex = {}  #Index of each item in baseUtilities and diminishingFactors. Rebuilt by updateUtilityArrays()
+		self.baseUtilities = np.zeros(0)
+		self.diminishingFactors = np.zeros(0)
+		self.utilityArraysSource = None  #The utilityFunctions dict the arrays were built from
 		self.eating = False
+		self.doneEatingEvent = threading.Event()  #Cleared while the agent is eating
+		self.doneEatingEvent.set()
 		self.autoEatFlag = False
 		if (itemDict):
-			for itemName in itemDict:
+			#Sample B and D for every item in one vectorized call
+			itemNames = list(itemDict.keys())
+			paramMeans = []
+			paramStdDevs = []
+			for itemName in itemNames:
 				itemFunctionParams = itemDict[itemName]["UtilityFunctions"]
-				self.utilityFunctions[itemName] = UtilityFunction(itemFunctionParams["BaseUtility"]["mean"], itemFunctionParams["BaseUtility"]["stdDev"], itemFunctionParams["DiminishingFactor"]["mean"], itemFunctionParams["DiminishingFactor"]["stdDev"])
+				paramMeans.append(itemFunctionParams["BaseUtility"]["mean"])
+				paramMeans.append(itemFunctionParams["DiminishingFactor"]["mean"])
+				paramStdDevs.append(itemFunctionParams["BaseUtility"]["stdDev"])
+				paramStdDevs.append(itemFunctionParams["DiminishingFactor"]["stdDev"])
+			paramSamples = utils.getNormalSamples(paramMeans, paramStdDevs)
+
+			for itemIndex, itemName in enumerate(itemNames):
+				self.utilityFunctions[itemName] = UtilityFunction.fromParams(paramSamples[2*itemIndex], paramSamples[(2*itemIndex)+1])
 				if ("NutritionalFacts" in itemDict[itemName]):
 					nutrition = itemDict[itemName]["NutritionalFacts"]
 					nutrition["vector"] = np.array([nutrition["kcalories"], nutrition["carbohydrates(g)"], nutrition["protein(g)"], nutrition["fat(g)"]])
 					self.nutritionalDict[itemName] = nutrition
 
+			self.updateUtilityArrays()
+
 		#Keep track of agent nutrition
 		self.enableNutrition = False
 		self.nutritionTracker = None
@@ -1579,6 +1699,9 @@ class Agent:
 		#Keep track of spawned threads
 		self.spawnedThreads = []
 
+		#Incoming packet dispatch table
+		self.packetHandlers = self.getPacketHandlers()
+
 		#Launch network link monitor
 		if (self.networkLink):
 			linkMonitor = threading.Thread(target=self.monitorNetworkLink)
@@ -1593,10 +1716,21 @@ class Agent:
 		Monitor/handle incoming packets on the pipe link to the ConnectionNetork
 		'''
 		self.logger.info("Monitoring networkLink {}".format(self.networkLink))
+		batchedPackets = collections.deque()
 		while True:
 			self.logger.debug("Monitoring networkLink {}".format(self.networkLink))
-			incommingPacket = self.networkLink.recvPipe.recv()
-			self.logger.info("INBOUND {}".format(incommingPacket))
+			if (len(batchedPackets) > 0):
+				incommingPacket = batchedPackets.popleft()
+			else:
+				incommingPacket = self.networkLink.recvPipe.recv()
+			if (self.infoLogging):
+				self.logger.info("INBOUND {}".format(incommingPacket))
+
+			#Unpack batched packets. They are handled in order before we read from the pipe again
+			if (incommingPacket.msgType == PACKET_TYPE.BATCH):
+				batchedPackets.extend(incommingPacket.payload)
+				continue
+
 			if ((incommingPacket.msgType == PACKET_TYPE.KILL_PIPE_AGENT) or (incommingPacket.msgType == PACKET_TYPE.KILL_ALL_BROADCAST)):
 				#Kill the network pipe before exiting monitor
 				killPacket = NetworkPacket(senderId=self.agentId, destinationId=self.agentId, msgType=PACKET_TYPE.KILL_PIPE_NETWORK)
@@ -1604,254 +1738,417 @@ class Agent:
 				self.logger.info("Killing networkLink {}".format(self.networkLink))
 				self.agentKillFlag = True
 
+				#Wake up any threads still waiting on a response or step event
+				for transactionId in list(self.responseQueues.keys()):
+					responseQueue = self.responseQueues.pop(transactionId, None)
+					if (responseQueue):
+						responseQueue.put(None)
+				self.fullfilledContractsEvent.set()
+				self.doneEatingEvent.set()
+
 				#Foward packet to controller
 				if (self.controller):
-					self.logger.debug("Fowarding msg to controller {}".format(incommingPacket))
-					controllerThread =  threading.Thread(target=self.controller.receiveMsg, args=(incommingPacket, ))
-					controllerThread.start()
-					self.spawnedThreads.append(controllerThread)
+					self.forwardToController(incommingPacket)
 				break
 
-			#Handle incoming acks
-			elif ((incommingPacket.msgType == PACKET_TYPE.CURRENCY_TRANSFER_ACK) or (incommingPacket.msgType == PACKET_TYPE.ITEM_TRANSFER_ACK) or (incommingPacket.msgType == PACKET_TYPE.LAND_TRANSFER_ACK) or	
-				(incommingPacket.msgType == PACKET_TYPE.TRADE_REQ_ACK) or (incommingPacket.msgType == PACKET_TYPE.LAND_TRADE_REQ_ACK) or (incommingPacket.msgType == PACKET_TYPE.LABOR_APPLICATION_ACK) or (incommingPacket.msgType == PACKET_TYPE.LABOR_CONTRACT_CANCEL_ACK) or
-				(incommingPacket.msgType == PACKET_TYPE.ITEM_MARKET_SAMPLE_ACK) or (incommingPacket.msgType == PACKET_TYPE.LABOR_MARKET_SAMPLE_ACK) or (incommingPacket.msgType == PACKET_TYPE.LAND_MARKET_SAMPLE_ACK) or 
-				(incommingPacket.msgType == PACKET_TYPE.TICK_BLOCKED_ACK)):
-				#Determine whether to handle this ack
-				handleAck = True
-				if (incommingPacket.msgType == PACKET_TYPE.CURRENCY_TRANSFER_ACK):
-					handleAck = self.needCurrencyTransferAck
-				elif (incommingPacket.msgType == PACKET_TYPE.ITEM_TRANSFER_ACK):
-					handleAck = self.needItemTransferAck
-				elif (incommingPacket.msgType == PACKET_TYPE.LAND_TRANSFER_ACK):
-					handleAck = self.needLandTransferAck
-				elif (incommingPacket.msgType == PACKET_TYPE.LABOR_CONTRACT_CANCEL_ACK):
-					handleAck = self.needLaborCancellationAck
-				elif (incommingPacket.msgType == PACKET_TYPE.TICK_BLOCKED_ACK):
-					handleAck = self.needTickBlockAck
-		
-				if (handleAck):
-					#Place incoming acks into the response buffer
-					acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-					if (acquired_responseBufferLock):
-						self.responseBuffer[incommingPacket.transactionId] = incommingPacket
-						self.responseBufferLock.release()  #<== release responseBufferLock
-					else:
-						self.logger.error("monitorNetworkLink() Lock \"responseBufferLock\" acquisition timeout")
-						break
+			#Dispatch packet to its handler
+			packetHandler = self.packetHandlers.get(incommingPacket.msgType)
+			if (packetHandler):
+				packetHandler(incommingPacket)
+			else:
+				#Unhandled packet type
+				self.logger.error("Received packet type {}. Ignoring packet {}".format(incommingPacket.msgType, incommingPacket))
 
-			#Handle errors
-			elif (incommingPacket.msgType == PACKET_TYPE.ERROR) or (incommingPacket.msgType == PACKET_TYPE.ERROR_CONTROLLER_START):
-				self.logger.error("{} {}".format(incommingPacket, incommingPacket.payload))
+		self.logger.info("Ending networkLink monitor".format(self.networkLink))
 
-			#Handle controller messages
-			elif ((incommingPacket.msgType == PACKET_TYPE.CONTROLLER_START) or (incommingPacket.msgType == PACKET_TYPE.CONTROLLER_START_BROADCAST)):
-				if (self.controller):
-					if (not self.controllerStart):
-						self.controllerStart = True
-						controllerThread =  threading.Thread(target=self.controller.controllerStart, args=(incommingPacket, ))
-						controllerThread.start()
-						self.spawnedThreads.append(controllerThread)
-				else:
-					warning = "Agent does not have controller to start"
-					self.logger.warning(warning)
-					responsePacket = NetworkPacket(senderId=self.agentId, destinationId=incommingPacket.senderId, msgType=PACKET_TYPE.ERROR_CONTROLLER_START, payload=warning)
 
-			
-			elif ((incommingPacket.msgType == PACKET_TYPE.CONTROLLER_MSG) or (incommingPacket.msgType == PACKET_TYPE.CONTROLLER_MSG_BROADCAST) or (incommingPacket.msgType == PACKET_TYPE.INFO_RESP)):
-				#Foward packet to controller
-				if (self.controller):
-					self.logger.debug("Fowarding msg to controller {}".format(incommingPacket))
-					controllerThread =  threading.Thread(target=self.controller.receiveMsg, args=(incommingPacket, ))
-					controllerThread.start()
-					self.spawnedThreads.append(controllerThread)
-				else:
-					self.logger.error("Agent {} does not have a controller. Ignoring {}".format(self.agentId, incommingPacket))
-
-
-			#Handle incoming payments
-			elif (incommingPacket.msgType == PACKET_TYPE.CURRENCY_TRANSFER):
-				amount = incommingPacket.payload["cents"]
-				self.receiveCurrency(amount, incommingPacket)
-				if (incommingPacket.transactionId in self.outstandingTrades):
-					self.outstandingTradesLock.acquire()
-					del self.outstandingTrades[incommingPacket.transactionId]
-					self.outstandingTradesLock.release()
-
-			#Handle incoming items
-			elif (incommingPacket.msgType == PACKET_TYPE.ITEM_TRANSFER):
-				itemPackage = incommingPacket.payload["item"]
-				self.receiveItem(itemPackage, incommingPacket)
-				if (incommingPacket.transactionId in self.outstandingTrades):
-					self.outstandingTradesLock.acquire()
-					del self.outstandingTrades[incommingPacket.transactionId]
-					self.outstandingTradesLock.release()
-
-			#Handle incoming land
-			elif (incommingPacket.msgType == PACKET_TYPE.LAND_TRANSFER):
-				allocation = incommingPacket.payload["allocation"]
-				hectares = incommingPacket.payload["hectares"]
-				self.receiveLand(allocation, hectares, incommingPacket)
-				if (incommingPacket.transactionId in self.outstandingTrades):
-					self.outstandingTradesLock.acquire()
-					del self.outstandingTrades[incommingPacket.transactionId]
-					self.outstandingTradesLock.release()
-
-			#Handle incoming trade requests
-			elif (incommingPacket.msgType == PACKET_TYPE.TRADE_REQ):
-				tradeRequest = incommingPacket.payload
-				tradeReqThread =  threading.Thread(target=self.receiveTradeRequest, args=(tradeRequest, incommingPacket.senderId))
-				tradeReqThread.start()
-				self.spawnedThreads.append(tradeReqThread)
-				#self.receiveTradeRequest(tradeRequest, incommingPacket.senderId)
-
-			#Handle incoming land trade requests
-			elif (incommingPacket.msgType == PACKET_TYPE.LAND_TRADE_REQ):
-				tradeRequest = incommingPacket.payload
-				landTradeThread =  threading.Thread(target=self.receiveLandTradeRequest, args=(tradeRequest, incommingPacket.senderId))
-				landTradeThread.start()
-				self.spawnedThreads.append(landTradeThread)
-				#self.receiveLandTradeRequest(tradeRequest, incommingPacket.senderId)
-
-			#Handle incoming job applications
-			elif (incommingPacket.msgType == PACKET_TYPE.LABOR_APPLICATION):
-				applicationPayload = incommingPacket.payload
-				laborAppThread =  threading.Thread(target=self.receiveJobApplication, args=(applicationPayload, incommingPacket.senderId))
-				laborAppThread.start()
-				self.spawnedThreads.append(laborAppThread)
-				#self.receiveJobApplication(applicationPayload, incommingPacket.senderId)
-
-			#Handle incoming labor
-			elif (incommingPacket.msgType == PACKET_TYPE.LABOR_TIME_SEND):
-				laborTicks = incommingPacket.payload["ticks"]
-				skillLevel = incommingPacket.payload["skillLevel"]
-				self.nextLaborInventoryLock.acquire()
-				if not (skillLevel in self.nextLaborInventory):
-					self.nextLaborInventory[skillLevel] = 0
-				self.nextLaborInventory[skillLevel] += laborTicks
-				self.logger.debug("nextLaborInventory[{}] += {}".format(skillLevel, laborTicks))
-				self.nextLaborInventoryLock.release()
-
-			#Handle incoming labor contract cancellations
-			elif (incommingPacket.msgType == PACKET_TYPE.LABOR_CONTRACT_CANCEL):
-				laborContract = incommingPacket.payload
-				self.removeLaborContract(laborContract, incommingPacket)
-
-			#Handle incoming information requests
-			elif ((incommingPacket.msgType == PACKET_TYPE.INFO_REQ) or (incommingPacket.msgType == PACKET_TYPE.INFO_REQ_BROADCAST)):
-				#infoThread =  threading.Thread(target=self.handleInfoRequest, args=(infoRequest, ))
-				#infoThread.start()
-				self.handleInfoRequest(incommingPacket)
-
-			#Handle incoming save checkpoint commands
-			elif ((incommingPacket.msgType == PACKET_TYPE.SAVE_CHECKPOINT) or (incommingPacket.msgType == PACKET_TYPE.SAVE_CHECKPOINT_BROADCAST)):
-				#Save agent checkpoint
-				self.saveCheckpoint()
-				#Foward to controller
-				if (self.controller):
-					controllerThread =  threading.Thread(target=self.controller.receiveMsg, args=(incommingPacket, ))
-					controllerThread.start()
-				self.spawnedThreads.append(controllerThread)
+	def getPacketHandlers(self):
+		'''
+		Returns a dict mapping each PACKET_TYPE this agent handles to the method monitorNetworkLink dispatches it to
+		'''
+		packetHandlers = {
+			#Acks
+			PACKET_TYPE.CURRENCY_TRANSFER_ACK: self.handleAck,
+			PACKET_TYPE.ITEM_TRANSFER_ACK: self.handleAck,
+			PACKET_TYPE.LAND_TRANSFER_ACK: self.handleAck,
+			PACKET_TYPE.TRADE_REQ_ACK: self.handleAck,
+			PACKET_TYPE.LAND_TRADE_REQ_ACK: self.handleAck,
+			PACKET_TYPE.LABOR_APPLICATION_ACK: self.handleAck,
+			PACKET_TYPE.LABOR_CONTRACT_CANCEL_ACK: self.handleAck,
+			PACKET_TYPE.ITEM_MARKET_SAMPLE_ACK: self.handleAck,
+			PACKET_TYPE.LABOR_MARKET_SAMPLE_ACK: self.handleAck,
+			PACKET_TYPE.LAND_MARKET_SAMPLE_ACK: self.handleAck,
+			PACKET_TYPE.TICK_BLOCKED_ACK: self.handleAck,
+
+			#Errors
+			PACKET_TYPE.ERROR: self.handleErrorPacket,
+			PACKET_TYPE.ERROR_CONTROLLER_START: self.handleErrorPacket,
+
+			#Controller messages
+			PACKET_TYPE.CONTROLLER_START: self.handleControllerStart,
+			PACKET_TYPE.CONTROLLER_START_BROADCAST: self.handleControllerStart,
+			PACKET_TYPE.CONTROLLER_MSG: self.forwardToController,
+			PACKET_TYPE.CONTROLLER_MSG_BROADCAST: self.forwardToController,
+			PACKET_TYPE.INFO_RESP: self.forwardToController,
+
+			#Transfers
+			PACKET_TYPE.CURRENCY_TRANSFER: self.handleCurrencyTransfer,
+			PACKET_TYPE.ITEM_TRANSFER: self.handleItemTransfer,
+			PACKET_TYPE.LAND_TRANSFER: self.handleLandTransfer,
+
+			#Trade requests
+			PACKET_TYPE.TRADE_REQ: self.handleTradeRequest,
+			PACKET_TYPE.LAND_TRADE_REQ: self.handleLandTradeRequest,
+
+			#Labor
+			PACKET_TYPE.LABOR_APPLICATION: self.handleJobApplication,
+			PACKET_TYPE.LABOR_TIME_SEND: self.handleLaborTimeSend,
+			PACKET_TYPE.LABOR_CONTRACT_CANCEL: self.handleLaborContractCancel,
+
+			#Information requests
+			PACKET_TYPE.INFO_REQ: self.handleInfoRequest,
+			PACKET_TYPE.INFO_REQ_BROADCAST: self.handleInfoRequest,
+
+			#Checkpoints
+			PACKET_TYPE.SAVE_CHECKPOINT: self.handleSaveCheckpoint,
+			PACKET_TYPE.SAVE_CHECKPOINT_BROADCAST: self.handleSaveCheckpoint,
+			PACKET_TYPE.LOAD_CHECKPOINT: self.handleLoadCheckpoint,
+			PACKET_TYPE.LOAD_CHECKPOINT_BROADCAST: self.handleLoadCheckpoint,
+
+			#Tick grants
+			PACKET_TYPE.TICK_GRANT: self.handleTickGrant,
+			PACKET_TYPE.TICK_GRANT_BROADCAST: self.handleTickGrant
+		}
 
-			#Handle incoming load checkpoint commands
-			elif ((incommingPacket.msgType == PACKET_TYPE.LOAD_CHECKPOINT) or (incommingPacket.msgType == PACKET_TYPE.LOAD_CHECKPOINT_BROADCAST)):
-				#Load agent checkpoint
-				filePath = incommingPacket.payload
-				self.loadCheckpoint(filePath=filePath)
-				#Foward to controller
-				if (self.controller):
-					controllerThread =  threading.Thread(target=self.controller.receiveMsg, args=(incommingPacket, ))
-					controllerThread.start()
+		return packetHandlers
+
+
+	def handleAck(self, incommingPacket):
+		'''
+		Hands an incoming ack to the thread waiting on it
+		'''
+		#Determine whether to handle this ack
+		handleAck = True
+		if (incommingPacket.msgType == PACKET_TYPE.CURRENCY_TRANSFER_ACK):
+			handleAck = self.needCurrencyTransferAck
+		elif (incommingPacket.msgType == PACKET_TYPE.ITEM_TRANSFER_ACK):
+			handleAck = self.needItemTransferAck
+		elif (incommingPacket.msgType == PACKET_TYPE.LAND_TRANSFER_ACK):
+			handleAck = self.needLandTransferAck
+		elif (incommingPacket.msgType == PACKET_TYPE.LABOR_CONTRACT_CANCEL_ACK):
+			handleAck = self.needLaborCancellationAck
+		elif (incommingPacket.msgType == PACKET_TYPE.TICK_BLOCKED_ACK):
+			handleAck = self.needTickBlockAck
+
+		if (handleAck):
+			responseQueue = self.responseQueues.pop(incommingPacket.transactionId, None)
+			if (responseQueue):
+				responseQueue.put(incommingPacket)
+			else:
+				self.logger.debug("No one is waiting on {}. Ignoring it".format(incommingPacket))
+
+
+	def handleErrorPacket(self, incommingPacket):
+		self.logger.error("{} {}".format(incommingPacket, incommingPacket.payload))
+
+
+	def handleControllerStart(self, incommingPacket):
+		if (self.controller):
+			if (not self.controllerStart):
+				self.controllerStart = True
+				controllerThread =  threading.Thread(target=self.controller.controllerStart, args=(incommingPacket, ))
+				controllerThread.start()
 				self.spawnedThreads.append(controllerThread)
+		else:
+			warning = "Agent does not have controller to start"
+			self.logger.warning(warning)
+			responsePacket = NetworkPacket(senderId=self.agentId, destinationId=incommingPacket.senderId, msgType=PACKET_TYPE.ERROR_CONTROLLER_START, payload=warning)
 
-			#Hanle incoming tick grants
-			elif ((incommingPacket.msgType == PACKET_TYPE.TICK_GRANT) or (incommingPacket.msgType == PACKET_TYPE.TICK_GRANT_BROADCAST)):
-				#Mark all previously spawned threads as elgible for garbage collection
-				self.logger.debug("Joining spawned threads")
-				for thread in self.spawnedThreads:
-					thread.join()
-				self.spawnedThreads.clear()
-
-				#This is the start of a new step
-				self.fullfilledContracts = False
-
-				ticksGranted = incommingPacket.payload
-				acquired_timeTickLock = self.timeTickLock.acquire(timeout=self.lockTimeout)  #<== timeTickLock acquire
-				if (acquired_timeTickLock):
-					self.timeTicks += ticksGranted
-					self.timeTickLock.release()  #<== timeTickLock release
-					self.stepNum += 1
-					self.logger.info("### Step Number = {} ###".format(self.stepNum))
 
-					acquired_tickBlockFlag_Lock = self.tickBlockFlag_Lock.acquire(timeout=self.lockTimeout)  #<== tickBlockFlag_Lock acquire
-					if (acquired_tickBlockFlag_Lock):
-						self.tickBlockFlag = False
-						self.tickBlockFlag_Lock.release()  #<== tickBlockFlag_Lock release
-					else:
-						self.logger.critical("TICK_GRANT tickBlockFlag_Lock acquire timeout")
+	def forwardToController(self, incommingPacket):
+		'''
+		Passes a packet to this agent's controller in a new thread
+		'''
+		if (self.controller):
+			self.logger.debug("Fowarding msg to controller {}".format(incommingPacket))
+			controllerThread =  threading.Thread(target=self.controller.receiveMsg, args=(incommingPacket, ))
+			controllerThread.start()
+			self.spawnedThreads.append(controllerThread)
+		else:
+			self.logger.error("Agent {} does not have a controller. Ignoring {}".format(self.agentId, incommingPacket))
 
-				else:
-					self.logger.critical("TICK_GRANT timeTickLock acquire timeout")
 
-				#Update accounting
-				self.updateAcountingAverages()
-
-				#Daily nutritional stuff
-				if (self.enableNutrition):
-					self.nutritionTracker.advanceStep()
-					if (self.autoEatFlag):
-						self.useTimeTicks(1)
-						self.eating = True
-						eatThread = threading.Thread(target=self.autoEat)
-						eatThread.start()
-						self.spawnedThreads.append(eatThread)
-
-				#Update time tick commitments
-				self.commitedTicks_nextStepLock.acquire()
-				self.commitedTicksLock.acquire()
-				self.commitedTicks = self.commitedTicks_nextStep
-				self.commitedTicksLock.release()
-				self.commitedTicks_nextStepLock.release()
-
-				#Fulfill labor contracts
-				contractThread = threading.Thread(target=self.fulfillAllLaborContracts)
-				contractThread.start()
-				self.spawnedThreads.append(contractThread)
-
-				#Foward tick grant to controller
-				if (self.controller):
-					controllerGrantThread = threading.Thread(target=self.controller.receiveMsg, args=(incommingPacket, ))
-					controllerGrantThread.start()
-					self.spawnedThreads.append(controllerGrantThread)
-				else:
-					#We don't have a controller. Relinquish all time ticks
-					self.relinquishTimeTicks()
+	def completeOutstandingTrade(self, transactionId):
+		'''
+		Removes transactionId from the outstanding trades, now that the counterparty's side of it has arrived
+		'''
+		if (transactionId in self.outstandingTrades):
+			self.outstandingTradesLock.acquire()
+			self.outstandingTrades.pop(transactionId, None)
+			self.outstandingTradesLock.release()
+
+
+	def handleCurrencyTransfer(self, incommingPacket):
+		amount = incommingPacket.payload["cents"]
+		self.receiveCurrency(amount, incommingPacket)
+		self.completeOutstandingTrade(incommingPacket.transactionId)
+
+
+	def handleItemTransfer(self, incommingPacket):
+		itemPackage = incommingPacket.payload["item"]
+		self.receiveItem(itemPackage, incommingPacket)
+		self.completeOutstandingTrade(incommingPacket.transactionId)
+
+
+	def handleLandTransfer(self, incommingPacket):
+		allocation = incommingPacket.payload["allocation"]
+		hectares = incommingPacket.payload["hectares"]
+		self.receiveLand(allocation, hectares, incommingPacket)
+		self.completeOutstandingTrade(incommingPacket.transactionId)
 
-			#Unhandled packet type
+
+	def handleTradeRequest(self, incommingPacket):
+		tradeRequest = incommingPacket.payload
+		tradeReqThread =  threading.Thread(target=self.receiveTradeRequest, args=(tradeRequest, incommingPacket.senderId))
+		tradeReqThread.start()
+		self.spawnedThreads.append(tradeReqThread)
+
+
+	def handleLandTradeRequest(self, incommingPacket):
+		tradeRequest = incommingPacket.payload
+		landTradeThread =  threading.Thread(target=self.receiveLandTradeRequest, args=(tradeRequest, incommingPacket.senderId))
+		landTradeThread.start()
+		self.spawnedThreads.append(landTradeThread)
+
+
+	def handleJobApplication(self, incommingPacket):
+		applicationPayload = incommingPacket.payload
+		laborAppThread =  threading.Thread(target=self.receiveJobApplication, args=(applicationPayload, incommingPacket.senderId))
+		laborAppThread.start()
+		self.spawnedThreads.append(laborAppThread)
+
+
+	def handleLaborTimeSend(self, incommingPacket):
+		laborTicks = incommingPacket.payload["ticks"]
+		skillLevel = incommingPacket.payload["skillLevel"]
+		self.nextLaborInventoryLock.acquire()
+		self.nextLaborInventory[skillLevel] += laborTicks
+		self.logger.debug("nextLaborInventory[{}] += {}".format(skillLevel, laborTicks))
+		self.nextLaborInventoryLock.release()
+
+
+	def handleLaborContractCancel(self, incommingPacket):
+		laborContract = incommingPacket.payload
+		self.removeLaborContract(laborContract, incommingPacket)
+
+
+	def handleSaveCheckpoint(self, incommingPacket):
+		#Save agent checkpoint
+		self.saveCheckpoint()
+		#Foward to controller
+		if (self.controller):
+			self.forwardToController(incommingPacket)
+
+
+	def handleLoadCheckpoint(self, incommingPacket):
+		#Load agent checkpoint
+		filePath = incommingPacket.payload
+		self.loadCheckpoint(filePath=filePath)
+		#Foward to controller
+		if (self.controller):
+			self.forwardToController(incommingPacket)
+
+
+	def handleTickGrant(self, incommingPacket):
+		#Mark all previously spawned threads as elgible for garbage collection
+		self.logger.debug("Joining spawned threads")
+		for thread in self.spawnedThreads:
+			thread.join()
+		self.spawnedThreads.clear()
+
+		#This is the start of a new step
+		self.fullfilledContracts = False
+		self.fullfilledContractsEvent.clear()
+
+		ticksGranted = incommingPacket.payload
+		acquired_timeTickLock = self.timeTickLock.acquire(timeout=self.lockTimeout)  #<== timeTickLock acquire
+		if (acquired_timeTickLock):
+			self.timeTicks += ticksGranted
+			self.timeTickLock.release()  #<== timeTickLock release
+			self.stepNum += 1
+			self.logger.info("### Step Number = {} ###".format(self.stepNum))
+
+			acquired_tickBlockFlag_Lock = self.tickBlockFlag_Lock.acquire(timeout=self.lockTimeout)  #<== tickBlockFlag_Lock acquire
+			if (acquired_tickBlockFlag_Lock):
+				self.tickBlockFlag = False
+				self.tickBlockFlag_Lock.release()  #<== tickBlockFlag_Lock release
 			else:
-				self.logger.error("Received packet type {}. Ignoring packet {}".format(incommingPacket.msgType, incommingPacket))
+				self.logger.critical("TICK_GRANT tickBlockFlag_Lock acquire timeout")
 
-		self.logger.info("Ending networkLink monitor".format(self.networkLink))
+		else:
+			self.logger.critical("TICK_GRANT timeTickLock acquire timeout")
+
+		#Update accounting
+		self.updateAcountingAverages()
+
+		#Daily nutritional stuff
+		if (self.enableNutrition):
+			self.nutritionTracker.advanceStep()
+			if (self.autoEatFlag):
+				self.useTimeTicks(1)
+				self.eating = True
+				self.doneEatingEvent.clear()
+				eatThread = threading.Thread(target=self.autoEat)
+				eatThread.start()
+				self.spawnedThreads.append(eatThread)
+
+		#Update time tick commitments
+		self.laborContractsLock.acquire()
+		self.commitedTicks = self.commitedTicks_nextStep
+		self.laborContractsLock.release()
+
+		#Fulfill labor contracts
+		contractThread = threading.Thread(target=self.fulfillAllLaborContracts)
+		contractThread.start()
+		self.spawnedThreads.append(contractThread)
+
+		#Foward tick grant to controller
+		if (self.controller):
+			controllerGrantThread = threading.Thread(target=self.controller.receiveMsg, args=(incommingPacket, ))
+			controllerGrantThread.start()
+			self.spawnedThreads.append(controllerGrantThread)
+		else:
+			#We don't have a controller. Relinquish all time ticks
+			self.relinquishTimeTicks()
+
+
+	def registerResponse(self, transactionId):
+		'''
+		Creates the queue that the response for transactionId will be delivered to.
+		Must be called before the request is sent, so that the response can't arrive before we're listening for it
+		'''
+		#The queue is used as a one-shot future. SimpleQueue is lighter than concurrent.futures.Future, which carries its own Condition and state machine
+		responseQueue = queue.SimpleQueue()
+		self.responseQueues[transactionId] = responseQueue
+		return responseQueue
+
+
+	def waitForResponse(self, transactionId, responseQueue):
+		'''
+		Blocks until the response for transactionId is received.
+		Returns the response packet, or None if the agent was killed before it arrived
+		'''
+		#Make sure the request isn't sitting in this thread's held packets
+		self.flushOutbound(keepHolding=True)
+		while True:
+			try:
+				return responseQueue.get(timeout=self.lockTimeout)
+			except queue.Empty:
+				if (self.agentKillFlag):
+					self.responseQueues.pop(transactionId, None)
+					return None
+
+
+	def sendRequest(self, requestPacket):
+		'''
+		Sends requestPacket and blocks until its response arrives. The response is matched on requestPacket.transactionId.
+		Returns the response packet, or None if the agent was killed before it arrived
+		'''
+		transactionId = requestPacket.transactionId
+		responseQueue = self.registerResponse(transactionId)
+		self.sendPacket(requestPacket)
+		return self.waitForResponse(transactionId, responseQueue)
 
 
 	def sendPacket(self, packet):
+		'''
+		Queues a packet for the network. Whichever thread holds networkSendLock flushes everything queued so far,
+		so packets sent concurrently by several threads are coalesced into a single BATCH pipe write.
+		If this thread called holdOutbound(), the packet is held until flushOutbound() instead
+		'''
 		if (self.agentKillFlag):
 			return
 
+		heldPackets = getattr(self.outboundHold, "packets", None)
+		if (heldPackets is not None):
+			#This thread is holding its packets. They'll be sent by flushOutbound()
+			heldPackets.append(packet)
+			return
+
 		if (self.networkLink):
-			self.logger.debug("Waiting for networkSendLock to send {}".format(packet))
-			#acquired_networkSendLock = self.networkSendLock.acquire(timeout=self.lockTimeout)
-			acquired_networkSendLock = self.networkSendLock.acquire()
-			if (acquired_networkSendLock):
-				self.logger.info("OUTBOUND {}".format(packet))
-				self.networkLink.sendPipe.send(packet)
-				self.networkSendLock.release()
-			else:
-				self.logger.error("{}.sendPacket() Lock networkSendLock acquire timeout | {}".format(self.agentId, packet))
+			self.sendQueue.append(packet)
+			self.flushSendQueue()
 		else:
 			self.logger.error("This agent is missing a networkLink. Cannot send packet {}".format(packet))
 
 
+	def holdOutbound(self):
+		'''
+		Holds back every packet this thread sends until flushOutbound() is called, so they reach the network as a single BATCH.
+		Packets sent by other threads are not affected.
+		Holds can be nested. Packets are only sent once every holdOutbound() has been matched by a flushOutbound(), so callers should flush in a finally block
+		'''
+		holdDepth = getattr(self.outboundHold, "depth", 0)
+		if (holdDepth == 0):
+			self.outboundHold.packets = []
+		self.outboundHold.depth = holdDepth + 1
+
+
+	def flushOutbound(self, keepHolding=False):
+		'''
+		Ends the innermost holdOutbound(). Once the outermost hold ends, all the packets this thread has held are sent.
+		If keepHolding is True, the held packets are sent immediately and the hold stays in place
+		'''
+		heldPackets = getattr(self.outboundHold, "packets", None)
+		if (heldPackets is None):
+			return
+
+		if (keepHolding):
+			if (len(heldPackets) == 0):
+				return
+			self.outboundHold.packets = []
+		else:
+			holdDepth = self.outboundHold.depth - 1
+			self.outboundHold.depth = holdDepth
+			if (holdDepth > 0):
+				#An outer hold is still active. It will send these packets
+				return
+			self.outboundHold.packets = None
+
+		if (len(heldPackets) > 0) and (not self.agentKillFlag):
+			if (self.networkLink):
+				self.sendQueue.extend(heldPackets)
+				self.flushSendQueue()
+			else:
+				self.logger.error("This agent is missing a networkLink. Cannot send packets {}".format(heldPackets))
+
+
+	def flushSendQueue(self):
+		'''
+		Writes the packets in sendQueue to the network pipe, unless another thread is already doing so
+		'''
+		while (len(self.sendQueue) > 0):
+			acquired_networkSendLock = self.networkSendLock.acquire(blocking=False)
+			if not (acquired_networkSendLock):
+				#Another thread is sending. It will flush our packet once it's done
+				return
+
+			outboundPackets = []
+			while (len(self.sendQueue) > 0):
+				outboundPackets.append(self.sendQueue.popleft())
+
+			if (self.infoLogging):
+				for outboundPacket in outboundPackets:
+					self.logger.info("OUTBOUND {}".format(outboundPacket))
+			if (len(outboundPackets) == 1):
+				self.networkLink.sendPipe.send(outboundPackets[0])
+			elif (len(outboundPackets) > 1):
+				batchPacket = NetworkPacket(senderId=self.agentId, msgType=PACKET_TYPE.BATCH, payload=outboundPackets)
+				self.networkLink.sendPipe.send(batchPacket)
+
+			self.networkSendLock.release()
+
+
 	#########################
 	# Accounting Methods
 	#########################
@@ -2056,15 +2353,17 @@ class Agent:
 		Returns True if transfer was succesful, False if not
 		'''
 		try:
-			self.logger.debug("{}.receiveCurrency({}) start".format(self.agentId, cents))
+			if (self.debugLogging):
+				self.logger.debug("{}.receiveCurrency({}) start".format(self.agentId, cents))
 
-			#Check if transfer is valid
+			#Check if transfer is valid. The sign is checked before truncating to whole cents, so small negative amounts aren't treated as 0
 			transferSuccess = False
 			transferComplete = False
 			if (cents < 0):
 				transferSuccess =  False
 				transferComplete = True
-			if (cents == 0):
+			cents = int(cents)
+			if (cents == 0) and (not transferComplete):
 				transferSuccess =  True
 				transferComplete = True
 
@@ -2073,8 +2372,9 @@ class Agent:
 				acquired_currencyBalanceLock = self.currencyBalanceLock.acquire(timeout=self.lockTimeout)  #<== acquire currencyBalanceLock
 				if (acquired_currencyBalanceLock):
 					#Lock acquired. Increment balance
-					self.currencyBalance = self.currencyBalance + int(cents)
-					self.logger.debug("New balance = ${}".format(self.currencyBalance/100))
+					self.currencyBalance += cents
+					if (self.debugLogging):
+						self.logger.debug("New balance = ${}".format(self.currencyBalance/100))
 					self.currencyBalanceLock.release()  #<== release currencyBalanceLock
 
 					transferSuccess = True
@@ -2093,8 +2393,8 @@ class Agent:
 			#Update accounting
 			if (transferSuccess and self.currencyInflowTracking):
 				self.currencyInflowLock.acquire()
-				self.stepCurrencyInflow += int(cents)
-				self.totalCurrencyInflow += int(cents)
+				self.stepCurrencyInflow += cents
+				self.totalCurrencyInflow += cents
 				self.currencyInflowLock.release()
 
 			if (transferSuccess and self.laborIncomeTracking):
@@ -2102,12 +2402,13 @@ class Agent:
 					paymentId = incommingPacket.payload["paymentId"]
 					if ("LaborPayment_" in paymentId):
 						self.laborIncomeLock.acquire()
-						self.stepLaborIncome += int(cents)
-						self.totalLaborIncome += int(cents)
+						self.stepLaborIncome += cents
+						self.totalLaborIncome += cents
 						self.laborIncomeLock.release()
 
 			#Return transfer status
-			self.logger.debug("{}.receiveCurrency({}) return {}".format(self.agentId, cents, transferSuccess))
+			if (self.debugLogging):
+				self.logger.debug("{}.receiveCurrency({}) return {}".format(self.agentId, cents, transferSuccess))
 			return transferSuccess
 
 		except Exception as e:
@@ -2116,24 +2417,32 @@ class Agent:
 			raise ValueError("receiveCurrency() Exception")
 
 
-	def sendCurrency(self, cents, recipientId, transactionId=None, delResponse=True):
+	def sendCurrency(self, cents, recipientId, transactionId=None):
 		'''
 		Send currency to another agent. 
 		Returns True if transfer was succesful, False if not
 		'''
 		try:
-			self.logger.debug("{}.sendCurrency({}, {}) start".format(self.agentId, cents, recipientId))
+			if (self.debugLogging):
+				self.logger.debug("{}.sendCurrency({}, {}) start".format(self.agentId, cents, recipientId))
 
-			#Check for valid transfers
+			#Check for valid transfers. The amount we were given is validated before it's truncated to whole cents
 			if (cents == 0):
-				self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, False))
+				if (self.debugLogging):
+					self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, False))
 				return True
+			if (cents < 0):
+				self.logger.error("{}.sendCurrency({}, {}) failed. Cannot send a negative amount".format(self.agentId, cents, recipientId))
+				return False
 			if (recipientId == self.agentId):
-				self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, True))
+				if (self.debugLogging):
+					self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, True))
 				return True
-			if (cents > self.currencyBalance):
-				self.logger.error("Balance too small ({}). Cannot send {}".format(self.currencyBalance, cents))
-				self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, False))
+
+			requestedCents = cents
+			cents = int(cents)
+			if (cents == 0):
+				self.logger.error("{}.sendCurrency({}, {}) failed. Amount is less than 1 cent".format(self.agentId, requestedCents, recipientId))
 				return False
 
 			#Start transfer
@@ -2141,9 +2450,18 @@ class Agent:
 
 			acquired_currencyBalanceLock = self.currencyBalanceLock.acquire(timeout=self.lockTimeout)  #<== acquire currencyBalanceLock
 			if (acquired_currencyBalanceLock):
-				#Decrement balance
-				self.currencyBalance -= int(cents)
-				self.logger.debug("New balance = ${}".format(self.currencyBalance/100))
+				#Check and decrement balance under the same lock, so concurrent sends can't overdraw
+				if (cents > self.currencyBalance):
+					currencyBalance = self.currencyBalance
+					self.currencyBalanceLock.release()  #<== release currencyBalanceLock
+					self.logger.error("Balance too small ({}). Cannot send {}".format(currencyBalance, cents))
+					if (self.debugLogging):
+						self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, False))
+					return False
+
+				self.currencyBalance -= cents
+				if (self.debugLogging):
+					self.logger.debug("New balance = ${}".format(self.currencyBalance/100))
 				self.currencyBalanceLock.release()  #<== release currencyBalanceLock
 
 				#Send payment packet
@@ -2152,16 +2470,15 @@ class Agent:
 					paymentId = "{}_{}_{}".format(self.agentId, recipientId, cents)
 				transferPayload = {"paymentId": paymentId, "cents": cents}
 				transferPacket = NetworkPacket(senderId=self.agentId, destinationId=recipientId, msgType=PACKET_TYPE.CURRENCY_TRANSFER, payload=transferPayload, transactionId=paymentId)
+				if (self.needCurrencyTransferAck):
+					responseQueue = self.registerResponse(paymentId)
 				self.sendPacket(transferPacket)
 
 				if (self.needCurrencyTransferAck):
 					#Wait for transaction response
-					while not (paymentId in self.responseBuffer):
-						time.sleep(self.responsePollTime)
-						if (self.agentKillFlag):
-							return False
-						
-					responsePacket = self.responseBuffer[paymentId]
+					responsePacket = self.waitForResponse(paymentId, responseQueue)
+					if not (responsePacket):
+						return False
 
 					#Undo balance change if not successful
 					transferSuccess = bool(responsePacket.payload["transferSuccess"])
@@ -2171,24 +2488,14 @@ class Agent:
 						self.currencyBalanceLock.acquire()  #<== acquire currencyBalanceLock
 						self.currencyBalance += cents
 						self.currencyBalanceLock.release()  #<== acquire currencyBalanceLock
-
-					#Remove transaction from response buffer
-					if (delResponse):
-						acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-						if (acquired_responseBufferLock):
-							del self.responseBuffer[paymentId]
-							self.responseBufferLock.release()  #<== release responseBufferLock
-						else:
-							self.logger.error("sendCurrency() Lock \"responseBufferLock\" acquisition timeout")
-							transferSuccess = False
 				else:
 					transferSuccess = True
 
 				#Update accounting
 				if (transferSuccess and self.currencyOutflowTracking):
 					self.currencyOutflowLock.acquire()
-					self.stepCurrencyOutflow += int(cents)
-					self.totalCurrencyOutflow += int(cents)
+					self.stepCurrencyOutflow += cents
+					self.totalCurrencyOutflow += cents
 					self.currencyOutflowLock.release()
 				
 			else:
@@ -2196,12 +2503,13 @@ class Agent:
 				self.logger.error("sendCurrency() Lock \"currencyBalanceLock\" acquisition timeout")
 				transferSuccess = False
 
-			self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, transferSuccess))
+			if (self.debugLogging):
+				self.logger.debug("{}.sendCurrency({}, {}) return {}".format(self.agentId, cents, recipientId, transferSuccess))
 			return transferSuccess
 
 		except Exception as e:
 			self.logger.critical("sendCurrency() Exception")
-			self.logger.critical("selg.agentId={}, cents={}, recipientId={}, transactionId={}, delResponse={}".format(self.agentId, cents, recipientId, transactionId, delResponse))
+			self.logger.critical("selg.agentId={}, cents={}, recipientId={}, transactionId={}".format(self.agentId, cents, recipientId, transactionId))
 			raise ValueError("sendCurrency() Exception")
 
 	#########################
@@ -2213,20 +2521,26 @@ class Agent:
 		Returns True if item was successfully added, False if not
 		'''
 		try:
-			self.logger.debug("{}.receiveItem({}) start".format(self.agentId, itemPackage))
+			if (self.debugLogging):
+				self.logger.debug("{}.receiveItem({}) start".format(self.agentId, itemPackage))
 			received = False
 
 			acquired_inventoryLock = self.inventoryLock.acquire(timeout=self.lockTimeout)  #<== acquire inventoryLock
 			if (acquired_inventoryLock):
 				itemId = itemPackage.id
-				if not (itemId in self.inventory):
-					self.inventory[itemId] = itemPackage
-					self.logger.debug("old {}.inventory[{}]=None".format(self.agentId, itemId))
+				inventoryEntry = self.inventory.get(itemId)
+				if (inventoryEntry is None):
+					#Store our own container so later in-place updates never alias the caller's package
+					self.inventory[itemId] = ItemContainer(itemId, itemPackage.quantity)
+					if (self.debugLogging):
+						self.logger.debug("old {}.inventory[{}]=None".format(self.agentId, itemId))
 				else:
-					self.logger.debug("old {}.inventory[{}]={}".format(self.agentId, itemId, self.inventory[itemId]))
-					self.inventory[itemId] += itemPackage
+					if (self.debugLogging):
+						self.logger.debug("old {}.inventory[{}]={}".format(self.agentId, itemId, inventoryEntry))
+					inventoryEntry.quantity = utils.truncateFloat(inventoryEntry.quantity + itemPackage.quantity, inventoryEntry.quantPercision)
 
-				self.logger.debug("new {}.inventory[{}]={}".format(self.agentId, itemId, self.inventory[itemId]))
+				if (self.debugLogging):
+					self.logger.debug("new {}.inventory[{}]={}".format(self.agentId, itemId, self.inventory[itemId]))
 				self.inventoryLock.release()  #<== release inventoryLock
 
 				received = True
@@ -2242,7 +2556,8 @@ class Agent:
 				received = False
 
 			#Return status
-			self.logger.debug("{}.receiveItem({}) return {}".format(self.agentId, itemPackage, received))
+			if (self.debugLogging):
+				self.logger.debug("{}.receiveItem({}) return {}".format(self.agentId, itemPackage, received))
 			return received
 
 		except Exception as e:
@@ -2251,13 +2566,14 @@ class Agent:
 			raise ValueError("receiveItem() Exception")
 
 
-	def sendItem(self, itemPackage, recipientId, transactionId=None, delResponse=True):
+	def sendItem(self, itemPackage, recipientId, transactionId=None):
 		'''
 		Send an item to another agent.
 		Returns True if item was successfully sent, False if not
 		'''
 		try:
-			self.logger.debug("{}.sendItem({}, {}) start".format(self.agentId, itemPackage, recipientId))
+			if (self.debugLogging):
+				self.logger.debug("{}.sendItem({}, {}) start".format(self.agentId, itemPackage, recipientId))
 
 			transferSuccess = False
 			transferValid = False
@@ -2266,19 +2582,19 @@ class Agent:
 			if (acquired_inventoryLock):
 				#Ensure we have enough stock to send item
 				itemId = itemPackage.id
-				if not (itemId in self.inventory):
+				currentStock = self.inventory.get(itemId)
+				if (currentStock is None):
 					self.logger.error("sendItem() {} not in agent inventory".format(itemId))
 					transferSuccess = False
 					transferValid = False
 				else:
-					currentStock = self.inventory[itemId]
 					if(currentStock.quantity < itemPackage.quantity):
 						self.logger.error("sendItem() Current stock {} not sufficient to send {}".format(currentStock, itemPackage))
 						transferSuccess = False
 						transferValid = False
 					else:
 						#We have enough stock. Subtract transfer amount from inventory
-						self.inventory[itemId] -= itemPackage
+						currentStock.quantity = utils.truncateFloat(currentStock.quantity - itemPackage.quantity, currentStock.quantPercision)
 						transferValid = True
 
 				self.inventoryLock.release()  #<== release inventoryLock
@@ -2291,16 +2607,18 @@ class Agent:
 				if (transferValid):
 					transferPayload = {"transferId": transferId, "item": itemPackage}
 					transferPacket = NetworkPacket(senderId=self.agentId, destinationId=recipientId, msgType=PACKET_TYPE.ITEM_TRANSFER, payload=transferPayload, transactionId=transferId)
+					if (self.needItemTransferAck):
+						responseQueue = self.registerResponse(transferId)
 					self.sendPacket(transferPacket)
 
-				if (self.needItemTransferAck):
+				if not (transferValid):
+					#Nothing was sent, so there is no response to wait for
+					transferSuccess = False
+				elif (self.needItemTransferAck):
 					#Wait for transaction response
-					while not (transferId in self.responseBuffer):
-						time.sleep(self.responsePollTime)
-						if (self.agentKillFlag):
-							return False
-						
-					responsePacket = self.responseBuffer[transferId]
+					responsePacket = self.waitForResponse(transferId, responseQueue)
+					if not (responsePacket):
+						return False
 
 					#Undo inventory change if not successful
 					transferSuccess = bool(responsePacket.payload["transferSuccess"])
@@ -2310,16 +2628,6 @@ class Agent:
 						self.inventoryLock.acquire()  #<== acquire currencyBalanceLock
 						self.inventory[itemId] += itemPackage
 						self.inventoryLock.release()  #<== acquire currencyBalanceLock
-
-					#Remove transaction from response buffer
-					if (delResponse):
-						acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-						if (acquired_responseBufferLock):
-							del self.responseBuffer[transferId]
-							self.responseBufferLock.release()  #<== release responseBufferLock
-						else:
-							self.logger.error("sendItem() Lock \"responseBufferLock\" acquisition timeout")
-							transferSuccess = False
 				else:
 					transferSuccess = True
 
@@ -2329,12 +2637,13 @@ class Agent:
 				transferSuccess = False
 
 			#Return status
-			self.logger.debug("{}.sendItem({}, {}) return {}".format(self.agentId, itemPackage, recipientId, transferSuccess))
+			if (self.debugLogging):
+				self.logger.debug("{}.sendItem({}, {}) return {}".format(self.agentId, itemPackage, recipientId, transferSuccess))
 			return transferSuccess
 
 		except Exception as e:
 			self.logger.critical("sendItem() Exception")
-			self.logger.critical("selg.agentId={}, itemPackage={}, recipientId={}, transactionId={}, delResponse={}".format(self.agentId, itemPackage, recipientId, transactionId, delResponse))
+			self.logger.critical("selg.agentId={}, itemPackage={}, recipientId={}, transactionId={}".format(self.agentId, itemPackage, recipientId, transactionId))
 			raise ValueError("sendItem() Exception")
 
 
@@ -2535,7 +2844,8 @@ class Agent:
 		Returns True if trade is completed, False if not
 		'''
 		try:
-			self.logger.debug("Executing {}".format(request))
+			if (self.debugLogging):
+				self.logger.debug("Executing {}".format(request))
 			tradeCompleted = False
 
 			if (self.agentId == request.buyerId):
@@ -2568,7 +2878,8 @@ class Agent:
 					self.totalTradeRevenue += request.currencyAmount
 					self.tradeRevenueLock.release()
 
-			self.logger.debug("Completed {}".format(request))
+			if (self.debugLogging):
+				self.logger.debug("Completed {}".format(request))
 			return tradeCompleted
 
 		except Exception as e:
@@ -2675,15 +2986,9 @@ class Agent:
 			#Send trade offer
 			tradeId = request.reqId
 			tradePacket = NetworkPacket(senderId=self.agentId, destinationId=recipientId, msgType=PACKET_TYPE.TRADE_REQ, payload=request, transactionId=tradeId)
-			self.sendPacket(tradePacket)
-			
-			#Wait for trade response
-			while not (tradeId in self.responseBuffer):
-				time.sleep(self.responsePollTime)
-				if (self.agentKillFlag):
-					return False
-				
-			responsePacket = self.responseBuffer[tradeId]
+			responsePacket = self.sendRequest(tradePacket)
+			if not (responsePacket):
+				return False
 
 			#Execute trade if request accepted
 			offerAccepted = bool(responsePacket.payload["accepted"])
@@ -2694,15 +2999,6 @@ class Agent:
 				self.logger.info("{} was rejected".format(request))
 				tradeCompleted = offerAccepted
 
-			#Remove transaction from response buffer
-			acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-			if (acquired_responseBufferLock):
-				del self.responseBuffer[tradeId]
-				self.responseBufferLock.release()  #<== release responseBufferLock
-			else:
-				self.logger.error("sendTradeRequest({}) Lock \"responseBufferLock\" acquisition timeout".format(request))
-				transferSuccess = False
-
 			self.tradeRequestLock.release()  #<== release tradeRequestLock
 			self.logger.debug("{}.sendTradeRequest({}, {}) return {}".format(self.agentId, request, recipientId, tradeCompleted))
 			return tradeCompleted
@@ -2805,7 +3101,7 @@ class Agent:
 			raise ValueError("receiveLand() Exception")
 
 
-	def sendLand(self, allocation, hectares, recipientId, transactionId=None, delResponse=True):
+	def sendLand(self, allocation, hectares, recipientId, transactionId=None):
 		'''
 		Send land to another agent.
 		Returns True if land was successfully sent, False if not
@@ -2844,16 +3140,18 @@ class Agent:
 				if (transferValid):
 					transferPayload = {"transferId": transferId, "allocation": allocation, "hectares": hectares}
 					transferPacket = NetworkPacket(senderId=self.agentId, destinationId=recipientId, msgType=PACKET_TYPE.LAND_TRANSFER, payload=transferPayload, transactionId=transferId)
+					if (self.needLandTransferAck):
+						responseQueue = self.registerResponse(transferId)
 					self.sendPacket(transferPacket)
 
-				if (self.needLandTransferAck):
+				if not (transferValid):
+					#Nothing was sent, so there is no response to wait for
+					transferSuccess = False
+				elif (self.needLandTransferAck):
 					#Wait for transaction response
-					while not (transferId in self.responseBuffer):
-						time.sleep(self.responsePollTime)
-						if (self.agentKillFlag):
-							return False
-						
-					responsePacket = self.responseBuffer[transferId]
+					responsePacket = self.waitForResponse(transferId, responseQueue)
+					if not (responsePacket):
+						return False
 
 					#Undo inventory change if not successful
 					transferSuccess = bool(responsePacket.payload["transferSuccess"])
@@ -2863,16 +3161,6 @@ class Agent:
 						self.landHoldingsLock.acquire()  #<== acquire currencyBalanceLock
 						self.landHoldings[allocation] += hectares
 						self.landHoldingsLock.release()  #<== acquire currencyBalanceLock
-
-					#Remove transaction from response buffer
-					if (delResponse):
-						acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-						if (acquired_responseBufferLock):
-							del self.responseBuffer[transferId]
-							self.responseBufferLock.release()  #<== release responseBufferLock
-						else:
-							self.logger.error("sendLand() Lock \"responseBufferLock\" acquisition timeout")
-							transferSuccess = False
 				else:
 					transferSuccess = True
 
@@ -2887,7 +3175,7 @@ class Agent:
 
 		except Exception as e:
 			self.logger.critical("sendLand() Exception")
-			self.logger.critical("self.agentId={}, allocation={}, hectares={}, recipientId={}, transactionId={}, delResponse={}".format(self.agentId, allocation, hectares, recipientId, transactionId, delResponse))
+			self.logger.critical("self.agentId={}, allocation={}, hectares={}, recipientId={}, transactionId={}".format(self.agentId, allocation, hectares, recipientId, transactionId))
 			raise ValueError("sendLand() Exception")
 
 
@@ -3028,15 +3316,9 @@ class Agent:
 			#Send trade offer
 			tradeId = request.reqId
 			tradePacket = NetworkPacket(senderId=self.agentId, destinationId=recipientId, msgType=PACKET_TYPE.LAND_TRADE_REQ, payload=request, transactionId=tradeId)
-			self.sendPacket(tradePacket)
-			
-			#Wait for trade response
-			while not (tradeId in self.responseBuffer):
-				time.sleep(self.responsePollTime)
-				if (self.agentKillFlag):
-					return False
-				
-			responsePacket = self.responseBuffer[tradeId]
+			responsePacket = self.sendRequest(tradePacket)
+			if not (responsePacket):
+				return False
 
 			#Execute trade if request accepted
 			offerAccepted = bool(responsePacket.payload["accepted"])
@@ -3047,15 +3329,6 @@ class Agent:
 				self.logger.info("{} was rejected".format(request))
 				tradeCompleted = offerAccepted
 
-			#Remove transaction from response buffer
-			acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-			if (acquired_responseBufferLock):
-				del self.responseBuffer[tradeId]
-				self.responseBufferLock.release()  #<== release responseBufferLock
-			else:
-				self.logger.error("sendLandTradeRequest({}) Lock \"responseBufferLock\" acquisition timeout".format(request))
-				transferSuccess = False
-
 			self.landTradeRequestLock.release()  #<== release landTradeRequestLock
 			self.logger.debug("{}.sendLandTradeRequest({}, {}) return {}".format(self.agentId, request, recipientId, tradeCompleted))
 			return tradeCompleted
@@ -3073,26 +3346,55 @@ class Agent:
 		Fulfills all non-expired labor contracts
 		'''
 		self.laborContractsLock.acquire()
-		laborContractsTemp = copy.deepcopy(self.laborContracts)
-		self.laborContractsLock.release()
-		for endStep in list(laborContractsTemp.keys()):
-			if (self.stepNum > endStep):
+
+		#Remove expired contracts. The expiry heap is ordered by endStep, so only the expired buckets are visited
+		while (len(self.laborContractExpiryHeap) > 0) and (self.laborContractExpiryHeap[0] < self.stepNum):
+			endStep = heapq.heappop(self.laborContractExpiryHeap)
+			if (self.debugLogging):
 				self.logger.debug("Removing all contracts that expire on step {}".format(endStep))
+			for laborContractHash in self.laborContractsByEndStep.pop(endStep, ()):
+				if (self.laborContracts.pop(laborContractHash, None) is not None):
+					self.laborContractsTotal -= 1
+			self.commitedTicks_nextStep -= self.laborContractTicksByEndStep.pop(endStep, 0)
 
-				self.commitedTicks_nextStepLock.acquire()
-				for laborContractHash in laborContractsTemp[endStep]:
-					self.commitedTicks_nextStep -= laborContractsTemp[endStep][laborContractHash].ticksPerStep
-				self.commitedTicks_nextStepLock.release()
+		#Only live contracts are left after expiry. They are never modified once stored, so a shallow snapshot is enough. Keeps the time spent holding laborContractsLock short
+		activeContracts = list(self.laborContracts.values())
+		self.laborContractsLock.release()
 
-				self.laborContractsLock.acquire()
-				self.laborContractsTotal -= len(laborContractsTemp[endStep])
-				del self.laborContracts[endStep]
-				self.laborContractsLock.release()
-			else:
-				for laborContractHash in laborContractsTemp[endStep]:
-					self.fulfillLaborContract(laborContractsTemp[endStep][laborContractHash])
+		#Every contract sends a packet, so send them to the network together once all contracts are handled
+		self.holdOutbound()
+		try:
+			netLaborExpense = 0
+			for laborContract in activeContracts:
+				#Expired contracts were removed above, so we can go straight to the role specific fulfillment
+				if (self.agentId == laborContract.workerId):
+					self.fulfillLaborContractAsWorker(laborContract)
+				else:
+					contractFulfilled, laborExpense = self.fulfillLaborContractAsEmployer(laborContract)
+					netLaborExpense += laborExpense
+
+			#Update accounting once for all the wages paid this step
+			self.recordLaborExpense(netLaborExpense)
+		finally:
+			self.flushOutbound()
 
 		self.fullfilledContracts = True
+		self.fullfilledContractsEvent.set()
+
+
+	def storeLaborContract(self, laborContract):
+		'''
+		Adds a new labor contract to the contract dicts. The caller must hold laborContractsLock
+		'''
+		self.laborContracts[laborContract.hash] = laborContract
+		endStepContracts = self.laborContractsByEndStep.get(laborContract.endStep)
+		if (endStepContracts is None):
+			endStepContracts = set()
+			self.laborContractsByEndStep[laborContract.endStep] = endStepContracts
+			heapq.heappush(self.laborContractExpiryHeap, laborContract.endStep)
+		endStepContracts.add(laborContract.hash)
+		self.laborContractTicksByEndStep[laborContract.endStep] = self.laborContractTicksByEndStep.get(laborContract.endStep, 0) + laborContract.ticksPerStep
+		self.laborContractsTotal += 1
 
 
 	def fulfillLaborContract(self, laborContract):
@@ -3100,59 +3402,79 @@ class Agent:
 		Fulfills an existing laborContract
 		'''
 		contractFulfilled = False
-		self.logger.info("Fulfilling {}".format(laborContract))
 
 		if (self.stepNum <= laborContract.endStep):
 			if (self.agentId == laborContract.workerId):
-				#We are the worker. Send labor to employer
-				ticks = laborContract.ticksPerStep
-				employerId = laborContract.employerId
-				contractHash = laborContract.hash
-
-				if (ticks > self.timeTicks):
-					self.logger.error("{}.sendLaborTime({}, {}) failed. Not enough time ticks ({})".format(self.agentId, ticks, employerId, self.timeTicks))
-					contractFulfilled = False
-				else:
-					laborId = "LaborSend_{}(agentId={}, employerId={}, ticks={})".format(contractHash, self.agentId, employerId, ticks, contractHash)
-					ticksSpent = self.useTimeTicks(ticks)
-					if (ticksSpent):
-						payload = {"ticks": ticks, "skillLevel": self.skillLevel}
-						laborPacket = NetworkPacket(senderId=self.agentId, destinationId=laborContract.employerId, transactionId=laborId, payload=payload, msgType=PACKET_TYPE.LABOR_TIME_SEND)
-						self.sendPacket(laborPacket)
-						contractFulfilled = True
-					else:
-						self.logger.error("{} failed".format(laborId))
-						contractFulfilled = False
-
-			if (self.agentId == laborContract.employerId):
-				#We are the employer. Send wages
-				ticks = laborContract.ticksPerStep
-				wage = laborContract.wagePerTick
-				netPayment = ticks*wage
-				if (self.currencyBalance < netPayment):
-					#We don't have enough money to pay this employee. Fire them
-					self.logger.warning("Current balance ${} not enough to honor {}. Cancelling this labor contract".format(round(float(self.currencyBalance)/100, 2), laborContract))
-					self.cancelLaborContract(laborContract)
-					return False
+				contractFulfilled = self.fulfillLaborContractAsWorker(laborContract)
+			elif (self.agentId == laborContract.employerId):
+				contractFulfilled, laborExpense = self.fulfillLaborContractAsEmployer(laborContract)
+				self.recordLaborExpense(laborExpense)
+		else:
+			self.logger.error("{} already expired".format(laborContract))
+			contractFulfilled = False
 
-				paymentId = "LaborPayment_{}".format(laborContract.hash)
-				paymentSent = self.sendCurrency(netPayment, laborContract.workerId, transactionId=paymentId)
-				if not (paymentSent):
-					self.logger.error("{} failed".format(paymentId))
+		return contractFulfilled
 
-				contractFulfilled = paymentSent
 
-				#Update accounting
-				if (self.laborExpenseTracking):
-					self.laborExpenseLock.acquire()
-					self.stepLaborExpense += netPayment
-					self.totalLaborExpense += netPayment
-					self.laborExpenseLock.release()
+	def fulfillLaborContractAsWorker(self, laborContract):
+		'''
+		Fulfills a non-expired laborContract where we are the worker, by sending our labor to the employer
+		'''
+		contractFulfilled = False
+		self.logger.info("Fulfilling {}".format(laborContract))
+
+		ticks = laborContract.ticksPerStep
+		employerId = laborContract.employerId
+		contractHash = laborContract.hash
+
+		#useTimeTicks checks our tick balance under timeTickLock, so there's no need to check it here first
+		ticksSpent = self.useTimeTicks(ticks)
+		if (ticksSpent):
+			laborId = ("LaborSend", contractHash)
+			payload = {"ticks": ticks, "skillLevel": self.skillLevel}
+			laborPacket = NetworkPacket(senderId=self.agentId, destinationId=employerId, transactionId=laborId, payload=payload, msgType=PACKET_TYPE.LABOR_TIME_SEND)
+			self.sendPacket(laborPacket)
+			contractFulfilled = True
 		else:
-			self.logger.error("{} already expired".format(laborContract))
+			self.logger.error("Sending labor for {} failed".format(laborContract))
 			contractFulfilled = False
 
 		return contractFulfilled
+
+
+	def fulfillLaborContractAsEmployer(self, laborContract):
+		'''
+		Fulfills a non-expired laborContract where we are the employer, by paying the worker's wages.
+		Cancels the contract if we can't afford them.
+		Returns (contractFulfilled, laborExpense). The caller is responsible for recording laborExpense with recordLaborExpense().
+		The wages count as an expense whenever the contract is honored, even if sending them fails
+		'''
+		self.logger.info("Fulfilling {}".format(laborContract))
+
+		netPayment = laborContract.ticksPerStep*laborContract.wagePerTick
+		if (self.currencyBalance < netPayment):
+			#We don't have enough money to pay this employee. Fire them
+			self.logger.warning("Current balance ${} not enough to honor {}. Cancelling this labor contract".format(round(float(self.currencyBalance)/100, 2), laborContract))
+			self.cancelLaborContract(laborContract)
+			return False, 0
+
+		paymentId = "LaborPayment_{}".format(laborContract.hash)
+		paymentSent = self.sendCurrency(netPayment, laborContract.workerId, transactionId=paymentId)
+		if not (paymentSent):
+			self.logger.error("{} failed".format(paymentId))
+
+		return paymentSent, netPayment
+
+
+	def recordLaborExpense(self, laborExpense):
+		'''
+		Adds wages paid to the labor expense accounting, under a single laborExpenseLock acquire
+		'''
+		if (self.laborExpenseTracking) and (laborExpense > 0):
+			self.laborExpenseLock.acquire()
+			self.stepLaborExpense += laborExpense
+			self.totalLaborExpense += laborExpense
+			self.laborExpenseLock.release()
 		
 
 	def receiveJobApplication(self, applicationPayload, senderId):
@@ -3175,10 +3497,12 @@ class Agent:
 			else:
 				#Offer is valid. Evaluate offer
 				if (self.controller):
-					self.logger.debug("Fowarding {} to controller {}".format(laborContract, self.controller.name))
+					if (self.debugLogging):
+						self.logger.debug("Fowarding {} to controller {}".format(laborContract, self.controller.name))
 					applicationAccepted = self.controller.evalJobApplication(laborContract)
 				else:
-					self.logger.debug("{} does not have a controller. Rejecting {}".format(self.agentId, laborContract))
+					if (self.debugLogging):
+						self.logger.debug("{} does not have a controller. Rejecting {}".format(self.agentId, laborContract))
 					applicationAccepted = False
 
 			#Notify counter party of response
@@ -3188,17 +3512,16 @@ class Agent:
 
 			#If accepted, add to existing labor contracts
 			if (applicationAccepted):
-				self.logger.debug("{} accepted".format(laborContract))
+				if (self.debugLogging):
+					self.logger.debug("{} accepted".format(laborContract))
 				self.laborContractsLock.acquire()
 				
-				if not (laborContract.endStep in self.laborContracts):
-					self.laborContracts[laborContract.endStep] = {}
-				self.laborContracts[laborContract.endStep][laborContract.hash] = laborContract
-				self.laborContractsTotal += 1
+				self.storeLaborContract(laborContract)
 
 				self.laborContractsLock.release()
 			else:
-				self.logger.debug("{} rejected".format(laborContract))
+				if (self.debugLogging):
+					self.logger.debug("{} rejected".format(laborContract))
 
 			return applicationAccepted
 
@@ -3219,57 +3542,39 @@ class Agent:
 			return False
 
 		try:
-			self.logger.debug("{}.sendJobApplication({}) start".format(self.agentId, laborListing))
+			if (self.debugLogging):
+				self.logger.debug("{}.sendJobApplication({}) start".format(self.agentId, laborListing))
 			applicationAccepted = False
 
 			#Send job application
 			laborContract = laborListing.generateLaborContract(workerId=self.agentId, workerSkillLevel=self.skillLevel, startStep=self.stepNum+1)
-			applicationId = "LaborApplication_{}(contract={})".format(laborContract.hash, laborContract)
+			applicationId = ("LaborApplication", laborContract.hash)
 			applicationPayload = {"laborContract": laborContract, "applicationId": applicationId}
 			applicationPacket = NetworkPacket(senderId=self.agentId, destinationId=laborListing.employerId, msgType=PACKET_TYPE.LABOR_APPLICATION, payload=applicationPayload, transactionId=applicationId)
-			self.sendPacket(applicationPacket)
-			
-			#Wait for application response
-			while not (applicationId in self.responseBuffer):
-				time.sleep(self.responsePollTime)
-				if (self.agentKillFlag):
-					return False
-				
-			responsePacket = self.responseBuffer[applicationId]
+			responsePacket = self.sendRequest(applicationPacket)
+			if not (responsePacket):
+				return False
 
 			#Execute trade if request accepted
 			employerAccepted = bool(responsePacket.payload["accepted"])
 			if (employerAccepted):
-				self.logger.info("{} was accepted".format(applicationId))
+				self.logger.info("Application for {} was accepted".format(laborContract))
 				#Add contract to contract dict
 				self.laborContractsLock.acquire()
 
-				if not (laborContract.endStep in self.laborContracts):
-					self.laborContracts[laborContract.endStep] = {}
-				self.laborContracts[laborContract.endStep][laborContract.hash] = laborContract
-				self.laborContractsTotal += 1
+				self.storeLaborContract(laborContract)
 				applicationAccepted = True
 
-				self.laborContractsLock.release()
-				
 				#Reserve ticks for this job
-				self.commitedTicks_nextStepLock.acquire()
 				self.commitedTicks_nextStep += laborContract.ticksPerStep
-				self.commitedTicks_nextStepLock.release()
-			else:
-				self.logger.info("{} was rejected".format(applicationId))
-				applicationAccepted = False
 
-			#Remove transaction from response buffer
-			acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-			if (acquired_responseBufferLock):
-				del self.responseBuffer[applicationId]
-				self.responseBufferLock.release()  #<== release responseBufferLock
+				self.laborContractsLock.release()
 			else:
-				self.logger.error("sendJobApplication({}) Lock \"responseBufferLock\" acquisition timeout".format(request))
-				transferSuccess = False
+				self.logger.info("Application for {} was rejected".format(laborContract))
+				applicationAccepted = False
 
-			self.logger.debug("{}.sendJobApplication({}) return {}".format(self.agentId, laborListing, applicationAccepted))
+			if (self.debugLogging):
+				self.logger.debug("{}.sendJobApplication({}) return {}".format(self.agentId, laborListing, applicationAccepted))
 			return applicationAccepted
 
 		except Exception as e:
@@ -3282,22 +3587,22 @@ class Agent:
 		'''
 		Remove an existing labor contract
 		'''
-		self.logger.debug("removeLaborContract({}, incommingPacket={}) start".format(laborContract, incommingPacket))
+		if (self.debugLogging):
+			self.logger.debug("removeLaborContract({}, incommingPacket={}) start".format(laborContract, incommingPacket))
 		
 		removalSuccess = True
 
 		endStep = laborContract.endStep
 		if (endStep > self.stepNum):
 			self.laborContractsLock.acquire()
-			if (endStep in self.laborContracts):
-				if (laborContract.hash in self.laborContracts[endStep]):
-					#Remove contract from contract dict
-					del self.laborContracts[laborContract.endStep][laborContract.hash]
+			endStepContracts = self.laborContractsByEndStep.get(endStep)
+			if (endStepContracts is not None):
+				#Remove contract from contract dict
+				if (self.laborContracts.pop(laborContract.hash, None) is not None):
+					endStepContracts.discard(laborContract.hash)
+					self.laborContractTicksByEndStep[endStep] -= laborContract.ticksPerStep
 					self.laborContractsTotal -= 1
-
-					self.commitedTicks_nextStepLock.acquire()
 					self.commitedTicks_nextStep -= laborContract.ticksPerStep
-					self.commitedTicks_nextStepLock.release()
 
 					self.laborContractsLock.release()
 
@@ -3318,7 +3623,8 @@ class Agent:
 				cancellationAckPacket = NetworkPacket(senderId=self.agentId, destinationId=incommingPacket.senderId, msgType=PACKET_TYPE.LABOR_CONTRACT_CANCEL_ACK, payload=ackPayload, transactionId=incommingPacket.transactionId)
 				self.sendPacket(cancellationAckPacket)
 
-		self.logger.debug("removeLaborContract({}) returned {}".format(laborContract, removalSuccess))
+		if (self.debugLogging):
+			self.logger.debug("removeLaborContract({}) returned {}".format(laborContract, removalSuccess))
 		return removalSuccess
 
 
@@ -3326,72 +3632,59 @@ class Agent:
 		'''
 		Cancels an existing labor contract. Returns True if successful, false if not
 		'''
-		self.logger.debug("cancelLaborContract({}) start".format(laborContract))
+		if (self.debugLogging):
+			self.logger.debug("cancelLaborContract({}) start".format(laborContract))
 
 		endStep = laborContract.endStep
 		if (endStep > self.stepNum):
+			#Make sure we have this contract. Only hold the lock for the lookup, not the network round trip
 			self.laborContractsLock.acquire()
-			if (endStep in self.laborContracts):
-				if (laborContract.hash in self.laborContracts[endStep]):
-					counterParty = None
-					if (laborContract.employerId == self.agentId):
-						#We are the employer
-						counterParty = laborContract.workerId
-					elif (laborContract.workerId == self.agentId):
-						#We are the employee
-						counterParty = laborContract.employerId
-					else:
-						self.laborContractsLock.release()
-						self.logger.error("cancelLaborContract({}) We are a third party to this contract. We cannot cancel it".format(laborContract))
-						return False
+			contractFound = (endStep in self.laborContractsByEndStep) and (laborContract.hash in self.laborContracts)
+			self.laborContractsLock.release()
 
-					if (counterParty):
-						transactionId = "CANCEL_{}".format(laborContract.hash)
-						cancelPacket = NetworkPacket(senderId=self.agentId, destinationId=counterParty, msgType=PACKET_TYPE.LABOR_CONTRACT_CANCEL, payload=laborContract, transactionId=transactionId)
-						self.sendPacket(cancelPacket)
-
-						cancellationSuccess = True
-						if (self.needLaborCancellationAck):
-							#Wait for transaction response
-							while not (transactionId in self.responseBuffer):
-								time.sleep(self.responsePollTime)
-								if (self.agentKillFlag):
-									self.laborContractsLock.release()
-									return False
-								
-							responsePacket = self.responseBuffer[transactionId]
-							cancellationSuccess = bool(responsePacket.payload["cancellationSuccess"])
-
-							#Remove transaction from response buffer
-							acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-							if (acquired_responseBufferLock):
-								del self.responseBuffer[transactionId]
-								self.responseBufferLock.release()  #<== release responseBufferLock
-							else:
-								self.logger.error("cancelLaborContract({}) Lock \"responseBufferLock\" acquisition timeout".format(laborContract))
-								
-						self.laborContractsLock.release()
-						if (cancellationSuccess):
-							self.removeLaborContract(laborContract)
-						else:
-							self.logger.error("cancelLaborContract({}) Ack from counterpart returned False".format(laborContract))
-							return False
+			if not (contractFound):
+				self.logger.warning("cancelLaborContract() {} not found".format(laborContract))
+				return False
 
-					else:
-						self.laborContractsLock.release()
-						self.logger.error("cancelLaborContract() Could not determine counterParty of {}".format(laborContract))
+			counterParty = None
+			if (laborContract.employerId == self.agentId):
+				#We are the employer
+				counterParty = laborContract.workerId
+			elif (laborContract.workerId == self.agentId):
+				#We are the employee
+				counterParty = laborContract.employerId
+			else:
+				self.logger.error("cancelLaborContract({}) We are a third party to this contract. We cannot cancel it".format(laborContract))
+				return False
+
+			if (counterParty):
+				transactionId = "CANCEL_{}".format(laborContract.hash)
+				cancelPacket = NetworkPacket(senderId=self.agentId, destinationId=counterParty, msgType=PACKET_TYPE.LABOR_CONTRACT_CANCEL, payload=laborContract, transactionId=transactionId)
+				if (self.needLaborCancellationAck):
+					responseQueue = self.registerResponse(transactionId)
+				self.sendPacket(cancelPacket)
+
+				cancellationSuccess = True
+				if (self.needLaborCancellationAck):
+					#Wait for transaction response
+					responsePacket = self.waitForResponse(transactionId, responseQueue)
+					if not (responsePacket):
 						return False
+					cancellationSuccess = bool(responsePacket.payload["cancellationSuccess"])
+						
+				if (cancellationSuccess):
+					self.removeLaborContract(laborContract)
 				else:
-					self.laborContractsLock.release()
-					self.logger.warning("cancelLaborContract() {} not found".format(laborContract))
+					self.logger.error("cancelLaborContract({}) Ack from counterpart returned False".format(laborContract))
 					return False
+
 			else:
-				self.laborContractsLock.release()
-				self.logger.warning("cancelLaborContract() {} not found".format(laborContract))
+				self.logger.error("cancelLaborContract() Could not determine counterParty of {}".format(laborContract))
 				return False
 
 
-		self.logger.debug("cancelLaborContract({}) completed".format(laborContract))
+		if (self.debugLogging):
+			self.logger.debug("cancelLaborContract({}) completed".format(laborContract))
 		return True
 
 	def getNetContractedEmployeeLabor(self):
@@ -3399,19 +3692,13 @@ class Agent:
 		Returns a dictionary of all current labor contracts in which this agent is the employer, organized by skill level
 		'''
 		self.laborContractsLock.acquire()
-		tempLaborContracts = copy.deepcopy(self.laborContracts)
+		laborContractsList = list(copy.deepcopy(self.laborContracts).values())
 		self.laborContractsLock.release()
-		laborContractsList =  []
-		for endStep in tempLaborContracts:
-			for contractHash in tempLaborContracts[endStep]:
-				laborContractsList.append(tempLaborContracts[endStep][contractHash])
 
 		employeeLaborInventory = {}
 		for contract in laborContractsList:
 			if (contract.employerId == self.agentId):
-				if not (contract.workerSkillLevel in employeeLaborInventory):
-					employeeLaborInventory[contract.workerSkillLevel] = 0
-				employeeLaborInventory[contract.workerSkillLevel] += contract.ticksPerStep
+				employeeLaborInventory[contract.workerSkillLevel] = employeeLaborInventory.get(contract.workerSkillLevel, 0) + contract.ticksPerStep
 
 		return employeeLaborInventory
 
@@ -3420,70 +3707,85 @@ class Agent:
 		Returns a list of all labor contracts
 		'''
 		self.laborContractsLock.acquire()
-		tempLaborContracts = copy.deepcopy(self.laborContracts)
+		laborContractsList = list(copy.deepcopy(self.laborContracts).values())
 		self.laborContractsLock.release()
-		laborContractsList =  []
-		for endStep in tempLaborContracts:
-			for contractHash in tempLaborContracts[endStep]:
-				laborContractsList.append(tempLaborContracts[endStep][contractHash])
 
 		return laborContractsList
 
 
 	#########################
-	# Item Market functions
+	# Market functions
 	#########################
-	def updateItemListing(self, itemListing):
+	def publishListing(self, msgType, listing, ownerId, methodName):
 		'''
-		Update the item marketplace.
+		Sends a listing update/remove packet to its marketplace. Only the owner of a listing (ownerId) can publish it.
+		Packets are cached by (msgType, listingStr), and reused when the same listing is published again.
 		Returns True if succesful, False otherwise
 		'''
-		self.logger.debug("{}.updateItemListing({}) start".format(self.agentId, itemListing))
+		if (self.debugLogging):
+			self.logger.debug("{}.{}({}) start".format(self.agentId, methodName, listing))
 
 		updateSuccess = False
-		
-		#If we're the seller, send out update to item market
-		if (itemListing.sellerId == self.agentId):
-			transactionId = itemListing.listingStr
-			updatePacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.ITEM_MARKET_UPDATE, payload=itemListing)
+
+		if (ownerId == self.agentId):
+			cacheKey = (msgType, listing.listingStr)
+			updatePacket = self.listingPacketCache.get(cacheKey)
+			if (updatePacket is None) or (updatePacket.payload.listingStr != listing.listingStr):
+				#Either we haven't sent this listing before, or the cached packet's listing has been changed since (ItemListing.updateMaxQuantity). Build a new packet
+				updatePacket = NetworkPacket(senderId=self.agentId, transactionId=listing.listingStr, msgType=msgType, payload=listing)
+				if (len(self.listingPacketCache) >= self.maxListingPacketCacheSize):
+					self.listingPacketCache.clear()
+				self.listingPacketCache[cacheKey] = updatePacket
+
 			self.sendPacket(updatePacket)
 			updateSuccess = True
-
 		else:
-			#We are not the item seller
-			self.logger.error("{}.updateItemListing({}) failed. {} is not the seller".format(self.agentId, itemListing, self.agentId))
+			#We do not own this listing
+			self.logger.error("{}.{}({}) failed. {} is not the owner of this listing".format(self.agentId, methodName, listing, self.agentId))
 			updateSuccess = False
 
 		#Return status
-		self.logger.debug("{}.updateItemListing({}) return {}".format(self.agentId, itemListing, updateSuccess))
+		if (self.debugLogging):
+			self.logger.debug("{}.{}({}) return {}".format(self.agentId, methodName, listing, updateSuccess))
 		return updateSuccess
 
-	def removeItemListing(self, itemListing):
+
+	#########################
+	# Item Market functions
+	#########################
+	def updateItemListing(self, itemListing):
 		'''
-		Remove a listing from the item marketplace
+		Update the item marketplace. If the market already has this listing's price and quantity, nothing is sent.
 		Returns True if succesful, False otherwise
 		'''
-		self.logger.debug("{}.removeItemListing({}) start".format(self.agentId, itemListing))
+		listingState = (itemListing.unitPrice, itemListing.maxQuantity)
 
-		updateSuccess = False
+		self.publishedItemListingsLock.acquire()  #<== acquire publishedItemListingsLock
+		if (itemListing.sellerId == self.agentId) and (self.publishedItemListings.get(itemListing.itemId) == listingState):
+			self.publishedItemListingsLock.release()  #<== release publishedItemListingsLock
+			return True
 
-		#If we're the seller, send out update to item market
-		if (itemListing.sellerId == self.agentId):
-			transactionId = itemListing.listingStr
-			updatePacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.ITEM_MARKET_REMOVE, payload=itemListing)
-			self.sendPacket(updatePacket)
-			updateSuccess = True
+		updateSuccess = self.publishListing(PACKET_TYPE.ITEM_MARKET_UPDATE, itemListing, itemListing.sellerId, "updateItemListing")
+		if (updateSuccess):
+			self.publishedItemListings[itemListing.itemId] = listingState
+		self.publishedItemListingsLock.release()  #<== release publishedItemListingsLock
 
-		else:
-			#We are not the item market or the seller
-			self.logger.error("{}.removeItemListing({}) failed. {} is not the itemMarket or the seller".format(self.agentId, itemListing, self.agentId))
-			updateSuccess = False
+		return updateSuccess
+
+	def removeItemListing(self, itemListing):
+		'''
+		Remove a listing from the item marketplace
+		Returns True if succesful, False otherwise
+		'''
+		self.publishedItemListingsLock.acquire()  #<== acquire publishedItemListingsLock
+		updateSuccess = self.publishListing(PACKET_TYPE.ITEM_MARKET_REMOVE, itemListing, itemListing.sellerId, "removeItemListing")
+		if (updateSuccess):
+			self.publishedItemListings.pop(itemListing.itemId, None)
+		self.publishedItemListingsLock.release()  #<== release publishedItemListingsLock
 
-		#Return status
-		self.logger.debug("{}.removeItemListing({}) return {}".format(self.agentId, itemListing, updateSuccess))
 		return updateSuccess
 
-	def sampleItemListings(self, itemContainer, sampleSize=3, delResponse=True):
+	def sampleItemListings(self, itemContainer, sampleSize=3):
 		'''
 		Returns a list of randomly sampled item listings that match itemContainer
 			ItemListing.itemId == itemContainer.id
@@ -3494,29 +3796,15 @@ class Agent:
 		sampledListings = []
 		
 		#Send request to itemMarketAgent
-		transactionId = "ITEM_MARKET_SAMPLE_{}_{}".format(itemContainer, time.time())
+		transactionId = ("ITEM_MARKET_SAMPLE", next(self.transactionCounter))
 		requestPayload = {"itemContainer": itemContainer, "sampleSize": sampleSize}
 		requestPacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.ITEM_MARKET_SAMPLE, payload=requestPayload)
-		self.sendPacket(requestPacket)
-
-		#Wait for response from itemMarket
-		while not (transactionId in self.responseBuffer):
-			time.sleep(self.responsePollTime)
-			if (self.agentKillFlag):
-				return False
-			
-		responsePacket = self.responseBuffer[transactionId]
+		#Wait for response from the market
+		responsePacket = self.sendRequest(requestPacket)
+		if not (responsePacket):
+			return False
 		sampledListings = responsePacket.payload
 
-		#Remove response from response buffer
-		if (delResponse):
-			acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-			if (acquired_responseBufferLock):
-				del self.responseBuffer[transactionId]
-				self.responseBufferLock.release()  #<== release responseBufferLock
-			else:
-				self.logger.error("sampleItemListings() Lock \"responseBufferLock\" acquisition timeout")
-
 		return sampledListings
 
 
@@ -3531,13 +3819,11 @@ class Agent:
 		if (itemContainer.id in self.inventory):
 			oldInventoryQuantity = self.inventory[itemContainer.id].quantity
 
-		#Sample market
+		#Sample market. The item market keeps at most one listing per seller per item, so each seller gets at most one trade request below
 		listingDict = {}
 		sampledListings = self.sampleItemListings(itemContainer, sampleSize=sampleSize)
 		for itemListing in sampledListings:
-			if not (itemListing.unitPrice in listingDict):
-				listingDict[itemListing.unitPrice] = []
-			listingDict[itemListing.unitPrice].append(itemListing)
+			listingDict.setdefault(itemListing.unitPrice, []).append(itemListing)
 		
 		if (len(listingDict) > 0):
 			priceKeys = list(listingDict.keys())
@@ -3647,52 +3933,16 @@ class Agent:
 		Update the labor marketplace.
 		Returns True if succesful, False otherwise
 		'''
-		self.logger.debug("{}.updateLaborListing({}) start".format(self.agentId, laborListing))
-
-		updateSuccess = False
-		
-		#If we're the employer, send out update to labor market
-		if (laborListing.employerId == self.agentId):
-			transactionId = laborListing.listingStr
-			updatePacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.LABOR_MARKET_UPDATE, payload=laborListing)
-			self.sendPacket(updatePacket)
-			updateSuccess = True
-
-		else:
-			#We are not the employer
-			self.logger.error("{}.updateLaborListing({}) failed. {} is not the employer".format(self.agentId, itemListing, self.agentId))
-			updateSuccess = False
-
-		#Return status
-		self.logger.debug("{}.updateLaborListing({}) return {}".format(self.agentId, laborListing, updateSuccess))
-		return updateSuccess
+		return self.publishListing(PACKET_TYPE.LABOR_MARKET_UPDATE, laborListing, laborListing.employerId, "updateLaborListing")
 
 	def removeLaborListing(self, laborListing):
 		'''
 		Remove a listing from the labor marketplace
 		Returns True if succesful, False otherwise
 		'''
-		self.logger.debug("{}.removeLaborListing({}) start".format(self.agentId, laborListing))
-
-		updateSuccess = False
+		return self.publishListing(PACKET_TYPE.LABOR_MARKET_REMOVE, laborListing, laborListing.employerId, "removeLaborListing")
 
-		#If we're the seller, send out update to item market
-		if (laborListing.employerId == self.agentId):
-			transactionId = laborListing.listingStr
-			updatePacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.LABOR_MARKET_REMOVE, payload=laborListing)
-			self.sendPacket(updatePacket)
-			updateSuccess = True
-
-		else:
-			#We are not the employer
-			self.logger.error("{}.removeLaborListing({}) failed. {} is not the itemMarket or the seller".format(self.agentId, laborListing, self.agentId))
-			updateSuccess = False
-
-		#Return status
-		self.logger.debug("{}.removeLaborListing({}) return {}".format(self.agentId, laborListing, updateSuccess))
-		return updateSuccess
-
-	def sampleLaborListings(self, sampleSize=3, maxSkillLevel=-1, minSkillLevel=0, delResponse=True):
+	def sampleLaborListings(self, sampleSize=3, maxSkillLevel=-1, minSkillLevel=0):
 		'''
 		Returns a list of sampled labor listings that agent qualifies for (listing.minSkillLevel <= agent.skillLevel).
 		Will sample listings in order of decreasing skill level, returning the highest possible skill-level listings. Samples are randomized within skill levels.
@@ -3705,29 +3955,15 @@ class Agent:
 			tempMaxSkillLevel = maxSkillLevel
 
 		#Send request to itemMarketAgent
-		transactionId = "LABOR_MARKET_SAMPLE_{}_{}".format(self.agentId, time.time())
+		transactionId = ("LABOR_MARKET_SAMPLE", next(self.transactionCounter))
 		requestPayload = {"maxSkillLevel": tempMaxSkillLevel, "minSkillLevel": minSkillLevel, "sampleSize": sampleSize}
 		requestPacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.LABOR_MARKET_SAMPLE, payload=requestPayload)
-		self.sendPacket(requestPacket)
-
-		#Wait for response from itemMarket
-		while not (transactionId in self.responseBuffer):
-			time.sleep(self.responsePollTime)
-			if (self.agentKillFlag):
-				return []
-			
-		responsePacket = self.responseBuffer[transactionId]
+		#Wait for response from the market
+		responsePacket = self.sendRequest(requestPacket)
+		if not (responsePacket):
+			return []
 		sampledListings = responsePacket.payload
 
-		#Remove response from response buffer
-		if (delResponse):
-			acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-			if (acquired_responseBufferLock):
-				del self.responseBuffer[transactionId]
-				self.responseBufferLock.release()  #<== release responseBufferLock
-			else:
-				self.logger.error("sampleLaborListings() Lock \"responseBufferLock\" acquisition timeout")
-
 		return sampledListings
 
 	#########################
@@ -3738,52 +3974,16 @@ class Agent:
 		Update the land marketplace.
 		Returns True if succesful, False otherwise
 		'''
-		self.logger.debug("{}.updateLandListing({}) start".format(self.agentId, landListing))
-
-		updateSuccess = False
-		
-		#If we're the seller, send out update to land market
-		if (landListing.sellerId == self.agentId):
-			transactionId = landListing.listingStr
-			updatePacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.LAND_MARKET_UPDATE, payload=landListing)
-			self.sendPacket(updatePacket)
-			updateSuccess = True
-
-		else:
-			#We are not the land seller
-			self.logger.error("{}.updateLandListing({}) failed. {} is not the seller".format(self.agentId, landListing, self.agentId))
-			updateSuccess = False
-
-		#Return status
-		self.logger.debug("{}.updateLandListing({}) return {}".format(self.agentId, landListing, updateSuccess))
-		return updateSuccess
+		return self.publishListing(PACKET_TYPE.LAND_MARKET_UPDATE, landListing, landListing.sellerId, "updateLandListing")
 
 	def removeLandListing(self, landListing):
 		'''
 		Remove a listing from the land marketplace
 		Returns True if succesful, False otherwise
 		'''
-		self.logger.debug("{}.removeLandListing({}) start".format(self.agentId, landListing))
+		return self.publishListing(PACKET_TYPE.LAND_MARKET_REMOVE, landListing, landListing.sellerId, "removeLandListing")
 
-		updateSuccess = False
-
-		#If we're the seller, send out update to land market
-		if (landListing.sellerId == self.agentId):
-			transactionId = landListing.listingStr
-			updatePacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.ITEM_MARKET_REMOVE, payload=landListing)
-			self.sendPacket(updatePacket)
-			updateSuccess = True
-
-		else:
-			#We are not the land market or the seller
-			self.logger.error("{}.removeLandListing({}) failed. {} is not the itemMarket or the seller".format(self.agentId, landListing, self.agentId))
-			updateSuccess = False
-
-		#Return status
-		self.logger.debug("{}.removeLandListing({}) return {}".format(self.agentId, landListing, updateSuccess))
-		return updateSuccess
-
-	def sampleLandListings(self, allocation, hectares, sampleSize=3, delResponse=True):
+	def sampleLandListings(self, allocation, hectares, sampleSize=3):
 		'''
 		Returns a list of randomly sampled item listings where
 			LandListing.allocation == allocation
@@ -3795,37 +3995,23 @@ class Agent:
 		sampledListings = []
 		
 		#Send request to itemMarketAgent
-		transactionId = "LAND_MARKET_SAMPLE_{}_{}_{}".format(allocation, hectares, time.time())
+		transactionId = ("LAND_MARKET_SAMPLE", next(self.transactionCounter))
 		requestPayload = {"allocation": allocation, "hectares": hectares, "sampleSize": sampleSize}
 		requestPacket = NetworkPacket(senderId=self.agentId, transactionId=transactionId, msgType=PACKET_TYPE.LAND_MARKET_SAMPLE, payload=requestPayload)
-		self.sendPacket(requestPacket)
-
-		#Wait for response from itemMarket
-		while not (transactionId in self.responseBuffer):
-			time.sleep(self.responsePollTime)
-			if (self.agentKillFlag):
-				return []
-			
-		responsePacket = self.responseBuffer[transactionId]
+		#Wait for response from the market
+		responsePacket = self.sendRequest(requestPacket)
+		if not (responsePacket):
+			return []
 		sampledListings = responsePacket.payload
 
-		#Remove response from response buffer
-		if (delResponse):
-			acquired_responseBufferLock = self.responseBufferLock.acquire(timeout=self.lockTimeout)  #<== acquire responseBufferLock
-			if (acquired_responseBufferLock):
-				del self.responseBuffer[transactionId]
-				self.responseBufferLock.release()  #<== release responseBufferLock
-			else:
-				self.logger.error("sampleLandListings() Lock \"responseBufferLock\" acquisition timeout")
-
 		return sampledListings
 
 	#########################
 	# Utility functions
 	#########################
-	def getMarginalUtility(self, itemId):
+	def getUtilityQuantity(self, itemId):
 		'''
-		Returns the current marginal utility of an itemId
+		Returns the quantity of itemId that our marginal utility is evaluated at
 		'''
 		quantity = 1
 		if (itemId in self.inventory):
@@ -3836,13 +4022,43 @@ class Agent:
 			if (itemId in self.nutritionalDict):
 				quantity += self.nutritionTracker.getQuantityConsumed(self, itemId)
 
+		return quantity
+
+	def getMarginalUtility(self, itemId):
+		'''
+		Returns the current marginal utility of an itemId
+		'''
+		quantity = self.getUtilityQuantity(itemId)
+
 		utilityFunction = self.utilityFunctions[itemId]
 		try:
-			marginalUtility = utilityFunction.getMarginalUtility(quantity)
+			return utilityFunction.getMarginalUtility(quantity)
 		except:
 			self.logger.critical("getMarginalUtility({}) quantity={}".format(itemId, quantity))
+			raise
 
-		return utilityFunction.getMarginalUtility(quantity)
+	def updateUtilityArrays(self):
+		'''
+		Rebuilds the utility parameter arrays used by getMarginalUtilities from utilityFunctions.
+		Must be called whenever utilityFunctions is replaced or changed
+		'''
+		itemNames = list(self.utilityFunctions.keys())
+		self.utilityItemIndex = {itemName: itemIndex for itemIndex, itemName in enumerate(itemNames)}
+		self.baseUtilities = np.array([self.utilityFunctions[itemName].baseUtility for itemName in itemNames])
+		self.diminishingFactors = np.array([self.utilityFunctions[itemName].diminishingFactor for itemName in itemNames])
+		self.utilityArraysSource = self.utilityFunctions
+
+	def getMarginalUtilities(self, itemIds):
+		'''
+		Vectorized getMarginalUtility. Returns a numpy array with the current marginal utility of each item in itemIds
+		'''
+		#Utility parameters as arrays, so the marginal utility of many items can be computed in one call. Rebuild them if utilityFunctions was replaced
+		if (self.utilityArraysSource is not self.utilityFunctions):
+			self.updateUtilityArrays()
+
+		itemIndexes = [self.utilityItemIndex[itemId] for itemId in itemIds]
+		quantities = np.array([self.getUtilityQuantity(itemId) for itemId in itemIds], dtype=np.float64)
+		return self.baseUtilities[itemIndexes] / np.power(quantities+1, self.diminishingFactors[itemIndexes])
 
 	#########################
 	# Time functions
@@ -3854,59 +4070,29 @@ class Agent:
 
 		Returns True if successful, False if not
 		'''
-		self.logger.debug("{}.useTimeTicks({}) start".format(self.agentId, amount))
+		if (self.debugLogging):
+			self.logger.debug("{}.useTimeTicks({}) start".format(self.agentId, amount))
 		useSuccess = False
 
 		if (amount > 0):
 			acquired_timeTickLock = self.timeTickLock.acquire(timeout=self.lockTimeout)  #<== timeTickLock acquire
 			if (acquired_timeTickLock):
 				if (self.timeTicks >= amount):
-					#We have enough ticks. Decrement tick counter
-					self.logger.debug("Using {} time ticks".format(amount))
+					#We have enough ticks. Decrement tick counter. Only the check and subtraction happen under the lock
 					self.timeTicks -= amount
-					self.logger.debug("Time tick balance = {}".format(self.timeTicks))
-					useSuccess = True
-
+					tickBalance = self.timeTicks
 					self.timeTickLock.release()  #<== timeTickLock release
 
+					if (self.debugLogging):
+						self.logger.debug("Used {} time ticks. Time tick balance = {}".format(amount, tickBalance))
+					useSuccess = True
+
 					#Advance land allocation queue
 					self.landAllocationQueue.useTimeTicks(amount)
 
-					if (self.timeTicks <= 0):
-						#We are out of time ticks. Set blocked flag
-						acquired_tickBlockFlag_Lock = self.tickBlockFlag_Lock.acquire(timeout=self.lockTimeout)  #<== tickBlockFlag_Lock acquire
-						if (acquired_tickBlockFlag_Lock):
-							self.tickBlockFlag = True
-							self.tickBlockFlag_Lock.release()  #<== tickBlockFlag_Lock release
-						else:
-							self.logger.error("TICK_GRANT tickBlockFlag_Lock acquire timeout")
-
-						#Move labor received in this step into the available labor for next step
-						self.laborInventoryLock.acquire()
-						self.nextLaborInventoryLock.acquire()
-
-						self.laborInventory = self.nextLaborInventory.copy()
-						self.nextLaborInventory = {}
-						self.logger.debug("laborInventory = {}".format(self.laborInventory))
-
-						self.laborInventoryLock.release()
-						self.nextLaborInventoryLock.release()
-
-						#Send blocked signal to sim manager
-						self.logger.debug("We're tick blocked. Sending TICK_BLOCKED to simManager")
-						if (self.needTickBlockAck):
-							tickBlockedId = "TickBlocked.{}.{}".format(self.agentId, self.stepNum)
-							while not (tickBlockedId in self.responseBuffer):
-								tickBlockPacket = NetworkPacket(senderId=self.agentId, msgType=PACKET_TYPE.TICK_BLOCKED, transactionId=tickBlockedId)
-								self.sendPacket(tickBlockPacket)
-								time.sleep(self.responsePollTime)
-
-							self.responseBufferLock.acquire()
-							del self.responseBuffer[tickBlockedId]
-							self.responseBufferLock.release()
-						else:
-							tickBlockPacket = NetworkPacket(senderId=self.agentId, msgType=PACKET_TYPE.TICK_BLOCKED)
-							self.sendPacket(tickBlockPacket)
+					#Only the call that took the balance to zero handles the transition to tick blocked
+					if (tickBalance <= 0):
+						self.enterTickBlock()
 
 				else:
 					#We do not have enought time ticks
@@ -3921,91 +4107,117 @@ class Agent:
 		else:
 			useSuccess = False
 
-		self.logger.debug("{}.useTimeTicks({}) return {}".format(self.agentId, amount, useSuccess))
+		if (self.debugLogging):
+			self.logger.debug("{}.useTimeTicks({}) return {}".format(self.agentId, amount, useSuccess))
 		return useSuccess
 
 
+	def enterTickBlock(self):
+		'''
+		Called once this agent has used up all of its time ticks for the step.
+		Sets the tickBlockFlag, rolls over the labor inventory, then sends TICK_BLOCKED to the sim manager (waiting for the ack if needTickBlockAck is set)
+		'''
+		#Set blocked flag
+		acquired_tickBlockFlag_Lock = self.tickBlockFlag_Lock.acquire(timeout=self.lockTimeout)  #<== tickBlockFlag_Lock acquire
+		if (acquired_tickBlockFlag_Lock):
+			self.tickBlockFlag = True
+			self.tickBlockFlag_Lock.release()  #<== tickBlockFlag_Lock release
+		else:
+			self.logger.error("enterTickBlock() tickBlockFlag_Lock acquire timeout")
+
+		#Move labor received in this step into the available labor for next step
+		self.rollOverLaborInventory()
+
+		#Send blocked signal to sim manager
+		self.logger.debug("We're tick blocked. Sending TICK_BLOCKED to simManager")
+		if (self.needTickBlockAck):
+			tickBlockedId = "TickBlocked.{}.{}".format(self.agentId, self.stepNum)
+			responseQueue = self.registerResponse(tickBlockedId)
+			tickBlockPacket = NetworkPacket(senderId=self.agentId, msgType=PACKET_TYPE.TICK_BLOCKED, transactionId=tickBlockedId)
+			resendDelay = self.responsePollTime
+			ackReceived = False
+			while not (ackReceived):
+				#Resend until acked, backing off exponentially so a slow simManager isn't flooded with duplicates
+				self.sendPacket(tickBlockPacket)
+				self.flushOutbound(keepHolding=True)
+				try:
+					responseQueue.get(timeout=resendDelay)
+					ackReceived = True
+				except queue.Empty:
+					resendDelay = min(resendDelay*2, self.responsePollMax)
+					if (self.agentKillFlag):
+						self.responseQueues.pop(tickBlockedId, None)
+						break
+		else:
+			self.sendPacket(self.tickBlockedPacket)
+
+
+	def rollOverLaborInventory(self):
+		'''
+		Makes the labor received this step available for the next step.
+		Lock order is always laborInventoryLock -> nextLaborInventoryLock. The dicts are swapped by reference, so nothing is copied while the locks are held
+		'''
+		self.laborInventoryLock.acquire()
+		self.nextLaborInventoryLock.acquire()
+
+		self.laborInventory, self.nextLaborInventory = self.nextLaborInventory, collections.defaultdict(int)
+		newLaborInventory = self.laborInventory
+
+		self.nextLaborInventoryLock.release()
+		self.laborInventoryLock.release()
+
+		if (self.debugLogging):
+			self.logger.debug("laborInventory = {}".format(newLaborInventory))
+
+
 	def relinquishTimeTicks(self):
 		'''
 		Relinquish all time ticks for this sim step.
 		Returns True if successful, False if not
 		'''
-		self.logger.debug("{}.relinquishTimeTicks() start".format(self.agentId))
-
-		self.logger.debug("{}.relinquishTimeTicks() waiting for time commitments to complete".format(self.agentId))
+		if (self.debugLogging):
+			self.logger.debug("{}.relinquishTimeTicks() start".format(self.agentId))
+			self.logger.debug("{}.relinquishTimeTicks() waiting for time commitments to complete".format(self.agentId))
+		#Each wait below returns as soon as its Event is set (KILL sets both), so waiting on them back to back costs no more than a single combined Condition
 		#Wait for labor contracts to be fullfilled
-		while not (self.fullfilledContracts):
-			time.sleep(self.responsePollTime)
+		while not (self.fullfilledContractsEvent.wait(timeout=self.lockTimeout)):
 			if (self.agentKillFlag):
 				return False
 
 		#Wait for agent to finish eating
-		while (self.eating):
-			time.sleep(self.responsePollTime)
+		while not (self.doneEatingEvent.wait(timeout=self.lockTimeout)):
 			if (self.agentKillFlag):
 				return False
 
-		self.logger.debug("{}.relinquishTimeTicks() time commitments completed".format(self.agentId))
+		if (self.agentKillFlag):
+			return False
 
-		#Use all remaining time ticks
-		acquired_timeTickLock = self.timeTickLock.acquire(timeout=self.lockTimeout)  #<== timeTickLock acquire
-		amount = self.timeTicks
-		if (amount > 0):
+		if (self.debugLogging):
+			self.logger.debug("{}.relinquishTimeTicks() time commitments completed".format(self.agentId))
+
+		#Use all remaining time ticks. The lock is skipped entirely when there's nothing left to use
+		amount = 0
+		if (self.timeTicks > 0):
+			acquired_timeTickLock = self.timeTickLock.acquire(timeout=self.lockTimeout)  #<== timeTickLock acquire
 			if (acquired_timeTickLock):
-				self.logger.debug("Using {} time ticks".format(amount))
-				self.timeTicks -= amount
-				self.logger.debug("Time tick balance = {}".format(self.timeTicks))
-				useSuccess = True
+				amount = self.timeTicks
+				if (amount > 0):
+					self.timeTicks -= amount
+					if (self.debugLogging):
+						self.logger.debug("Used {} time ticks. Time tick balance = {}".format(amount, self.timeTicks))
 
 				self.timeTickLock.release()  #<== timeTickLock release
-
-				#Advance land allocation queue
-				self.landAllocationQueue.useTimeTicks(amount)
-
-				if (self.timeTicks <= 0):
-					self.logger.debug("We're tick blocked. Setting tickBlockFlag to True")
-					#We are out of time ticks. Set blocked flag
-					acquired_tickBlockFlag_Lock = self.tickBlockFlag_Lock.acquire(timeout=self.lockTimeout)  #<== tickBlockFlag_Lock acquire
-					if (acquired_tickBlockFlag_Lock):
-						self.tickBlockFlag = True
-						self.tickBlockFlag_Lock.release()  #<== tickBlockFlag_Lock release
-					else:
-						self.logger.error("relinquishTimeTicks() tickBlockFlag_Lock acquire timeout")
-
-					#Move labor received in this step into the available labor for next step
-					self.laborInventoryLock.acquire()
-					self.nextLaborInventoryLock.acquire()
-
-					self.laborInventory = self.nextLaborInventory.copy()
-					self.nextLaborInventory = {}
-					self.logger.debug("laborInventory = {}".format(self.laborInventory))
-
-					self.laborInventoryLock.release()
-					self.nextLaborInventoryLock.release()
-
-					#Send blocked signal to sim manager
-					self.logger.debug("We're tick blocked. Sending TICK_BLOCKED to simManager")
-					if (self.needTickBlockAck):
-						tickBlockedId = "TickBlocked.{}.{}".format(self.agentId, self.stepNum)
-						while not (tickBlockedId in self.responseBuffer):
-							tickBlockPacket = NetworkPacket(senderId=self.agentId, msgType=PACKET_TYPE.TICK_BLOCKED, transactionId=tickBlockedId)
-							self.sendPacket(tickBlockPacket)
-							time.sleep(self.responsePollTime)
-
-						self.responseBufferLock.acquire()
-						del self.responseBuffer[tickBlockedId]
-						self.responseBufferLock.release()
-					else:
-						tickBlockPacket = NetworkPacket(senderId=self.agentId, msgType=PACKET_TYPE.TICK_BLOCKED)
-						self.sendPacket(tickBlockPacket)
-
-
 			else:
 				#Lock timout
-				self.logger.error("{}.relinquishTimeTicks({}) timeTickLock acquire timeout".format(self.agentId, amount))
-				useSuccess = False
-		else:
-			self.timeTickLock.release()  #<== timeTickLock release
+				self.logger.error("{}.relinquishTimeTicks({}) timeTickLock acquire timeout".format(self.agentId, self.timeTicks))
+
+		if (amount > 0):
+			#Advance land allocation queue
+			self.landAllocationQueue.useTimeTicks(amount)
+
+			if (self.timeTicks <= 0):
+				self.logger.debug("We're tick blocked. Setting tickBlockFlag to True")
+				self.enterTickBlock()
 
 		return self.useTimeTicks(self.timeTicks)
 
@@ -4041,40 +4253,47 @@ class Agent:
 		self.logger.debug("autoEat() start")
 
 		mealPlan = self.nutritionTracker.getAutoMeal()
-		self.logger.debug("autoEat() mealPlan = {}".format(mealPlan))
+		if (self.debugLogging):
+			self.logger.debug("autoEat() mealPlan = {}".format(mealPlan))
 
 		#Acquire needed food
 		acquisitionSuccess = True
-		for foodId in mealPlan:
-			foodContainer = ItemContainer(foodId, mealPlan[foodId])
+		for foodId, foodQuantity in mealPlan.items():
+			foodContainer = ItemContainer(foodId, foodQuantity)
 			foodAcquired = self.acquireItem(foodContainer, sampleSize=5)
+			if (foodAcquired < (foodContainer.quantity-(2/pow(10,g_ItemQuantityPercision)))):
+				acquisitionSuccess = False
 			if (foodAcquired > 0):
-				self.consumeItem(ItemContainer(foodId, foodAcquired))
+				#Reuse the request container for consumption
+				foodContainer.quantity = utils.truncateFloat(foodAcquired, foodContainer.quantPercision)
+				self.consumeItem(foodContainer)
 
 		if not (acquisitionSuccess):
 			self.logger.warning("autoEat() Could not acquire all ingredients for meal plan {}".format(mealPlan))
 
 		self.eating = False
+		self.doneEatingEvent.set()
 
 		return acquisitionSuccess
 
 	#########################
 	# Misc functions
 	#########################
+	#Maps InfoRequest.infoKey to a function that returns the requested info for an agent
+	infoGetters = {
+		"currencyBalance": operator.attrgetter("currencyBalance"),
+		"inventory": operator.attrgetter("inventory"),
+		"debtBalance": operator.attrgetter("debtBalance"),
+		"acountingStats": operator.methodcaller("getAccountingStats"),
+		"laborContracts": operator.attrgetter("laborContracts")
+	}
+
 	def handleInfoRequest(self, incommingPacket):
 		infoRequest = incommingPacket.payload
-		if (infoRequest.agentFilter in self.agentId) or (len(infoRequest.agentFilter) == 0):
-			infoKey = infoRequest.infoKey
-			if (infoKey == "currencyBalance"):
-				infoRequest.info = self.currencyBalance
-			if (infoKey == "inventory"):
-				infoRequest.info = self.inventory
-			if (infoKey == "debtBalance"):
-				infoRequest.info = self.debtBalance
-			if (infoKey == "acountingStats"):
-				infoRequest.info = self.getAccountingStats()
-			if (infoKey == "laborContracts"):
-				infoRequest.info = self.laborContracts
+		if (len(infoRequest.agentFilter) == 0) or (infoRequest.agentFilter in self.agentId):
+			infoGetter = self.infoGetters.get(infoRequest.infoKey)
+			if (infoGetter):
+				infoRequest.info = infoGetter(self)
 			
 			infoRespPacket = NetworkPacket(senderId=self.agentId, destinationId=infoRequest.requesterId, msgType=PACKET_TYPE.INFO_RESP, payload=infoRequest, transactionId=incommingPacket.transactionId)
 			self.sendPacket(infoRespPacket)
@@ -4088,15 +4307,18 @@ class Agent:
 		self.logger.info("saveCheckpoint() start")
 		checkpointObj = AgentCheckpoint(self)
 
-		checkpointFileName = "{}.{}.checkpoint.pickle".format(self.agentId, self.agentType)
-		outputPath = os.path.join(self.outputDir, "CHECKPOINT", checkpointFileName)
 		if (filePath):
 			outputPath = filePath
-		utils.createFolderPath(outputPath)
+			utils.createFolderPath(outputPath)
+		else:
+			outputPath = self.checkpointFilePath
+			if not (self.checkpointDirCreated):
+				utils.createFolderPath(outputPath)
+				self.checkpointDirCreated = True
 
 		self.logger.info("saveCheckpoint() Saving checkpoint to \"{}\"".format(outputPath))
-		with open(outputPath, "wb") as pickleFile:
-			pickle.dump(checkpointObj, pickleFile)
+		with open(outputPath, "wb", buffering=1<<20) as pickleFile:
+			pickle.dump(checkpointObj, pickleFile, protocol=pickle.HIGHEST_PROTOCOL)
 
 	def loadCheckpoint(self, filePath=None):
 		'''
@@ -4106,11 +4328,10 @@ class Agent:
 		self.logger.info("loadCheckpoint(filePath={}) start".format(filePath))
 
 		#Determine checkpoint file path
-		checkpointFileName = "{}.{}.checkpoint.pickle".format(self.agentId, self.agentType)
-		checkpointFilePath = os.path.join(self.outputDir, "CHECKPOINT", checkpointFileName)
+		checkpointFilePath = self.checkpointFilePath
 		if (filePath):
 			if (os.path.isdir(filePath)):
-				checkpointFilePath = os.path.join(filePath, checkpointFileName)
+				checkpointFilePath = os.path.join(filePath, self.checkpointFileName)
 			else:
 				checkpointFilePath = filePath
 
@@ -4122,7 +4343,7 @@ class Agent:
 		try:
 			self.logger.info("loadCheckpoint() Trying to load checkpoint \"{}\"".format(checkpointFilePath))
 			checkpointObj = None
-			with open(checkpointFilePath, "rb") as pickleFile:
+			with open(checkpointFilePath, "rb", buffering=1<<20) as pickleFile:
 				checkpointObj = pickle.load(pickleFile)
 
 			if (checkpointObj):
@@ -4132,10 +4353,15 @@ class Agent:
 					raise ValueError("Loaded pickle was tpye \"{}\"".format(type(checkpointObj)))
 			else:
 				raise ValueError("Loaded pickle was None")
-		except:
-			self.logger.error("Error while loading checkpoint\n{}".format(traceback.format_exc()))
+		except Exception:
+			self.logger.error("Error while loading checkpoint", exc_info=True)
 			return False
 
+		#The item market may have been restored to different listings. Make sure our next updates are sent
+		self.publishedItemListingsLock.acquire()
+		self.publishedItemListings.clear()
+		self.publishedItemListingsLock.release()
+
 		self.logger.debug("loadCheckpoint() succeeded")
 		return True
 
@@ -4156,7 +4382,8 @@ class Agent:
 		if (self.controller):
 			if (not self.controllerStart):
 				self.controllerStart = True
-				controllerThread =  threading.Thread(target=self.controller.controllerStart, args=(controllerStartPacket, ))
+				#controllerStart only does setup and returns. Run it as a named daemon thread so it can never hold up process teardown
+				controllerThread =  threading.Thread(target=self.controller.controllerStart, args=(controllerStartPacket, ), name="{}.controllerStart".format(self.agentId), daemon=True)
 				controllerThread.start()
 				self.spawnedThreads.append(controllerThread)
 				return True
@@ -12,7 +12,6 @@ import os
 import random
 import time
 import pickle
-import traceback
 
 from NetworkClasses import *
 import utils
@@ -37,11 +36,9 @@ class ItemMarketplace:
 
 		#Item marketplace dict
 		self.itemMarket = {}
-		self.itemMarketLocks = {}
 		if (itemDict):
 			for itemName in itemDict:
 				self.itemMarket[itemName] = {}
-				self.itemMarketLocks[itemName] = threading.Lock()
 		else:
 			self.logger.error("No item dict passed to {}. Ending simulation".format(self.agentId))
 			terminatePacket = NetworkPacket(senderId=self.agentId, destinationId=self.simManagerId, msgType=PACKET_TYPE.TERMINATE_SIMULATION)
@@ -210,21 +207,9 @@ class ItemMarketplace:
 
 		self.logger.debug("{}.updateItemListing({}) start".format(self.agentId, itemListing))
 
-		updateSuccess = False
-
-		if not (itemListing.sellerId in self.itemMarket[itemListing.itemId]):
-			#Seller is new to this item. Add them to the market
-			itemLock = self.itemMarketLocks[itemListing.itemId]
-			acquired_itemMarketLock = itemLock.acquire(timeout=self.lockTimeout)  # <== itemMarketLock acquire
-			if (acquired_itemMarketLock):
-				self.itemMarket[itemListing.itemId][itemListing.sellerId] = itemListing
-				itemLock.release()  # <== itemMarketLock release
-			else:
-				self.logger.error("updateItemListing() Lock \"itemMarketLock\" acquisition timeout")
-				updateSuccess = False
-		else:
-			#Seller is already in selling this item. Dict size won't change. No need to acquire thread lock
-			self.itemMarket[itemListing.itemId][itemListing.sellerId] = itemListing
+		#Single dict assignments are atomic, and samplers copy the listings before using them, so no lock is needed
+		self.itemMarket[itemListing.itemId][itemListing.sellerId] = itemListing
+		updateSuccess = True
 
 		#Return status
 		self.logger.debug("{}.updateItemListing({}) return {}".format(self.agentId, itemListing, updateSuccess))
@@ -239,21 +224,10 @@ class ItemMarketplace:
 
 		self.logger.debug("{}.removeItemListing({}) start".format(self.agentId, itemListing))
 
-		updateSuccess = False
-
-		#Update local item market with listing
-		itemLock = self.itemMarketLocks[itemListing.itemId]
-		acquired_itemMarketLock = itemLock.acquire(timeout=self.lockTimeout)  # <== itemMarketLock acquire
-		if (acquired_itemMarketLock):
-			if (itemListing.itemId in self.itemMarket):
-				if (itemListing.sellerId in self.itemMarket[itemListing.itemId]):
-					del self.itemMarket[itemListing.itemId][itemListing.sellerId]
-
-			itemLock.release()  # <== itemMarketLock release
-			updateSuccess = True
-		else:
-			self.logger.error("removeItemListing() Lock \"itemMarketLock\" acquisition timeout")
-			updateSuccess = False
+		#Remove listing from local item market
+		if (itemListing.itemId in self.itemMarket):
+			self.itemMarket[itemListing.itemId].pop(itemListing.sellerId, None)
+		updateSuccess = True
 
 		#Return status
 		self.logger.debug("{}.removeItemListing({}) return {}".format(self.agentId, itemListing, updateSuccess))
@@ -306,8 +280,8 @@ class ItemMarketplace:
 		utils.createFolderPath(outputPath)
 
 		self.logger.info("saveCheckpoint() Saving checkpoint to \"{}\"".format(outputPath))
-		with open(outputPath, "wb") as pickleFile:
-			pickle.dump(checkpointObj, pickleFile)
+		with open(outputPath, "wb", buffering=1<<20) as pickleFile:
+			pickle.dump(checkpointObj, pickleFile, protocol=pickle.HIGHEST_PROTOCOL)
 
 	def loadCheckpoint(self, filePath=None):
 		'''
@@ -333,7 +307,7 @@ class ItemMarketplace:
 		try:
 			self.logger.info("loadCheckpoint() Trying to load checkpoint \"{}\"".format(checkpointFilePath))
 			checkpointObj = None
-			with open(checkpointFilePath, "rb") as pickleFile:
+			with open(checkpointFilePath, "rb", buffering=1<<20) as pickleFile:
 				checkpointObj = pickle.load(pickleFile)
 
 			if (checkpointObj):
@@ -343,8 +317,8 @@ class ItemMarketplace:
 					raise ValueError("Loaded pickle was tpye \"{}\"".format(type(checkpointObj)))
 			else:
 				raise ValueError("Loaded pickle was None")
-		except:
-			self.logger.error("Error while loading checkpoint\n{}".format(traceback.format_exc()))
+		except Exception:
+			self.logger.error("Error while loading checkpoint", exc_info=True)
 			return False
 
 		self.logger.debug("loadCheckpoint() succeeded")
@@ -710,8 +684,8 @@ class LaborMarketplace:
 		utils.createFolderPath(outputPath)
 
 		self.logger.info("saveCheckpoint() Saving checkpoint to \"{}\"".format(outputPath))
-		with open(outputPath, "wb") as pickleFile:
-			pickle.dump(checkpointObj, pickleFile)
+		with open(outputPath, "wb", buffering=1<<20) as pickleFile:
+			pickle.dump(checkpointObj, pickleFile, protocol=pickle.HIGHEST_PROTOCOL)
 
 	def loadCheckpoint(self, filePath=None):
 		'''
@@ -737,7 +711,7 @@ class LaborMarketplace:
 		try:
 			self.logger.info("loadCheckpoint() Trying to load checkpoint \"{}\"".format(checkpointFilePath))
 			checkpointObj = None
-			with open(checkpointFilePath, "rb") as pickleFile:
+			with open(checkpointFilePath, "rb", buffering=1<<20) as pickleFile:
 				checkpointObj = pickle.load(pickleFile)
 
 			if (checkpointObj):
@@ -747,8 +721,8 @@ class LaborMarketplace:
 					raise ValueError("Loaded pickle was tpye \"{}\"".format(type(checkpointObj)))
 			else:
 				raise ValueError("Loaded pickle was None")
-		except:
-			self.logger.error("Error while loading checkpoint\n{}".format(traceback.format_exc()))
+		except Exception:
+			self.logger.error("Error while loading checkpoint", exc_info=True)
 			return False
 
 		self.logger.debug("loadCheckpoint() succeeded")
@@ -1075,8 +1049,8 @@ class LandMarketplace:
 		utils.createFolderPath(outputPath)
 
 		self.logger.info("saveCheckpoint() Saving checkpoint to \"{}\"".format(outputPath))
-		with open(outputPath, "wb") as pickleFile:
-			pickle.dump(checkpointObj, pickleFile)
+		with open(outputPath, "wb", buffering=1<<20) as pickleFile:
+			pickle.dump(checkpointObj, pickleFile, protocol=pickle.HIGHEST_PROTOCOL)
 
 	def loadCheckpoint(self, filePath=None):
 		'''
@@ -1102,7 +1076,7 @@ class LandMarketplace:
 		try:
 			self.logger.info("loadCheckpoint() Trying to load checkpoint \"{}\"".format(checkpointFilePath))
 			checkpointObj = None
-			with open(checkpointFilePath, "rb") as pickleFile:
+			with open(checkpointFilePath, "rb", buffering=1<<20) as pickleFile:
 				checkpointObj = pickle.load(pickleFile)
 
 			if (checkpointObj):
@@ -1112,8 +1086,8 @@ class LandMarketplace:
 					raise ValueError("Loaded pickle was tpye \"{}\"".format(type(checkpointObj)))
 			else:
 				raise ValueError("Loaded pickle was None")
-		except:
-			self.logger.error("Error while loading checkpoint\n{}".format(traceback.format_exc()))
+		except Exception:
+			self.logger.error("Error while loading checkpoint", exc_info=True)
 			return False
 
 		self.logger.debug("loadCheckpoint() succeeded")
@@ -14,6 +14,7 @@ class PACKET_TYPE(Enum):
 	KILL_PIPE_NETWORK = 103
 	SNOOP_START = 104
 	ERROR = 105
+	BATCH = 106
 
 	#########################
 	# Trade Packets
@@ -100,7 +101,12 @@ class PACKET_TYPE(Enum):
 	RESET_ACCOUNTING = 9010
 
 
+g_PacketTypesByValue = {packetType.value: packetType for packetType in PACKET_TYPE}  #Unpickled packets look up their msgType here, which is faster than PACKET_TYPE(value)
+
+
 class NetworkPacket:
+	__slots__ = ("msgType", "payload", "senderId", "destinationId", "transactionId", "creationTime", "hash")  #Packets are created for every message, so skip the per-instance __dict__
+
 	def __init__(self, senderId, msgType, destinationId=None, payload=None, transactionId=None):
 		self.msgType = msgType
 		self.payload = payload
@@ -108,12 +114,38 @@ class NetworkPacket:
 		self.destinationId = destinationId
 		self.transactionId = transactionId
 
-		hashStr = "{}{}{}{}{}{}".format(msgType, payload, senderId, destinationId, transactionId, time.time())
-		self.hash = hashlib.sha256(hashStr.encode('utf-8')).hexdigest()[:8 ]
+		#The hash is only used to tell packets apart in logs, so it isn't computed until the packet is first printed.
+		#It only covers the header fields set here, so it doesn't depend on the payload's state at print time
+		self.creationTime = time.time()
+		self.hash = None
 
 	def __str__(self):
+		if (self.hash is None):
+			hashStr = "{}{}{}{}{}".format(self.msgType, self.senderId, self.destinationId, self.transactionId, self.creationTime)
+			self.hash = hashlib.sha256(hashStr.encode('utf-8')).hexdigest()[:8 ]
+
 		return "({}_{}, {}, {}, {})".format(self.msgType, self.hash, self.senderId, self.destinationId, self.transactionId)
 
+	def __reduce__(self):
+		#Every packet is pickled onto a pipe. Pickle it as a flat tuple instead of the default slot-name/value state dict
+		return (restoreNetworkPacket, (self.msgType.value, self.payload, self.senderId, self.destinationId, self.transactionId, self.creationTime, self.hash))
+
+
+def restoreNetworkPacket(msgTypeValue, payload, senderId, destinationId, transactionId, creationTime, packetHash):
+	'''
+	Rebuilds a pickled NetworkPacket. See NetworkPacket.__reduce__
+	'''
+	packet = NetworkPacket.__new__(NetworkPacket)
+	packet.msgType = g_PacketTypesByValue[msgTypeValue]
+	packet.payload = payload
+	packet.senderId = senderId
+	packet.destinationId = destinationId
+	packet.transactionId = transactionId
+	packet.creationTime = creationTime
+	packet.hash = packetHash
+	return packet
+
+
 class Link:
 	def __init__(self, sendPipe, recvPipe):
 		self.sendPipe = sendPipe
@@ -145,6 +177,11 @@ SNOOP_START
 ERROR
 	If send to an agent, the agent will print out the packet in an error logger. Currently only used for network errors.
 
+BATCH
+	payload = <list> [<NetworkPacket>, ...]
+	Several packets from the same sender coalesced into a single pipe write. The connection network routes each packet in the list as if it had been sent on its own.
+	Packets in the list with the same destination are forwarded to that agent as one BATCH, which the agent unpacks and handles in order
+
 #########################
 # Trade Packets
 #########################
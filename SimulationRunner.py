@@ -222,6 +222,7 @@ def RunSimulation(settingsDict, logLevel="INFO", outputDir=None):
 
 		#Create agent seeds
 		procCounter = 0
+		skillRng = np.random.default_rng()
 		for agentName in settingsDict["AgentSpawns"]:
 			for agentType in settingsDict["AgentSpawns"][agentName]:
 				agentSettings = settingsDict["AgentSpawns"][agentName][agentType]
@@ -234,15 +235,20 @@ def RunSimulation(settingsDict, logLevel="INFO", outputDir=None):
 				logger.debug("{}.{} Agents = {}".format(agentName, agentType, numAgents))
 				print("{}.{} Agents = {}".format(agentName, agentType, numAgents))
 
+				spawnSettings = {}
+				if ("settings" in agentSettings):
+					spawnSettings = agentSettings["settings"]
+
+				#Sample the skill levels for every agent of this type in one shot
+				alpha, beta = getSkillDistribution(spawnSettings)
+				skillLevels = skillRng.beta(alpha, beta, numAgents)
+
 				for i in range(numAgents):
 					agentId = "{}.{}.{}".format(agentName, agentType, i)
 					procNum = procCounter%numProcess
 					procCounter += 1
 
-					spawnSettings = {}
-					if ("settings" in agentSettings):
-						spawnSettings = agentSettings["settings"]
-					agentSeed = AgentSeed(agentId, agentType, ticksPerStep=settingsDict["TicksPerStep"], settings=spawnSettings, simManagerId=managerId, itemDict=allItemsDict, fileLevel=logLevel, outputDir=outputDirPath)
+					agentSeed = AgentSeed(agentId, agentType, ticksPerStep=settingsDict["TicksPerStep"], settings=spawnSettings, simManagerId=managerId, itemDict=allItemsDict, fileLevel=logLevel, outputDir=outputDirPath, skillLevel=float(skillLevels[i]))
 					spawnDict[procNum][agentId] = agentSeed
 					allAgentDict[agentId] = agentSeed.agentInfo
 		print("\n")
@@ -270,10 +276,10 @@ def RunSimulation(settingsDict, logLevel="INFO", outputDir=None):
 		# Setup ConnectionNetwork
 		##########################
 		xactNetwork = ConnectionNetwork(itemDict=allItemsDict, simManagerId=managerId, simulationSettings=settingsDict, outputDir=outputDirPath, logLevel=logLevel)
-		xactNetwork.addConnection(agentId=managerId, networkLink=simManagerSeed.networkLink)
+		xactNetwork.addConnection(agentId=managerId, networkLink=simManagerSeed.networkLink, acceptsBatches=True)
 		for procNum in spawnDict:
 			for agentId in spawnDict[procNum]:
-				xactNetwork.addConnection(agentId=agentId, networkLink=spawnDict[procNum][agentId].networkLink)
+				xactNetwork.addConnection(agentId=agentId, networkLink=spawnDict[procNum][agentId].networkLink, acceptsBatches=True)
 
 		##########################
 		# Launch subprocesses
@@ -604,23 +604,22 @@ class LaborContractTracker:
 				if (infoReq.transactionId == self.name):
 					#This is a list of requested labor contracts
 					contractDict = infoReq.info
-					for endStep in contractDict:
-						for contractHash in contractDict[endStep]:
-							#Skip this contract if we're loading from checkpoint and have already processed it
-							if (contractHash in self.loadedLaborContracts):
-								continue
-
-							self.loadedLaborContractsLock.acquire()
-							if (contractHash in self.loadedLaborContracts):
-								continue
-							else:
-								self.loadedLaborContracts[contractHash] = True
-							self.loadedLaborContractsLock.release()
+					for contractHash in contractDict:
+						#Skip this contract if we're loading from checkpoint and have already processed it
+						if (contractHash in self.loadedLaborContracts):
+							continue
+
+						self.loadedLaborContractsLock.acquire()
+						if (contractHash in self.loadedLaborContracts):
+							continue
+						else:
+							self.loadedLaborContracts[contractHash] = True
+						self.loadedLaborContractsLock.release()
 
-							#If we get here, this is the first time we've loaded this contract
-							laborContract = contractDict[endStep][contractHash]
-							self.logger.info("Processing {}".format(laborContract))
-							self.addLaborContract(laborContract)
+						#If we get here, this is the first time we've loaded this contract
+						laborContract = contractDict[contractHash]
+						self.logger.info("Processing {}".format(laborContract))
+						self.addLaborContract(laborContract)
 
 
 	def loadCheckpoint(self):
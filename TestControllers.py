@@ -3641,8 +3641,8 @@ class TestFarmCompetetiveV4:
 		utils.createFolderPath(outputPath)
 
 		self.logger.info("saveCheckpoint() Saving checkpoint to \"{}\"".format(outputPath))
-		with open(outputPath, "wb") as pickleFile:
-			pickle.dump(checkpointObj, pickleFile)
+		with open(outputPath, "wb", buffering=1<<20) as pickleFile:
+			pickle.dump(checkpointObj, pickleFile, protocol=pickle.HIGHEST_PROTOCOL)
 
 	def loadCheckpoint(self, filePath=None):
 		'''
@@ -3668,7 +3668,7 @@ class TestFarmCompetetiveV4:
 		try:
 			self.logger.info("loadCheckpoint() Trying to load checkpoint \"{}\"".format(checkpointFilePath))
 			checkpointObj = None
-			with open(checkpointFilePath, "rb") as pickleFile:
+			with open(checkpointFilePath, "rb", buffering=1<<20) as pickleFile:
 				checkpointObj = pickle.load(pickleFile)
 
 			if (checkpointObj):
@@ -3678,8 +3678,8 @@ class TestFarmCompetetiveV4:
 					raise ValueError("Loaded pickle was tpye \"{}\"".format(type(checkpointObj)))
 			else:
 				raise ValueError("Loaded pickle was None")
-		except:
-			self.logger.error("Error while loading checkpoint\n{}".format(traceback.format_exc()))
+		except Exception:
+			self.logger.error("Error while loading checkpoint", exc_info=True)
 			return False
 
 		self.logger.debug("loadCheckpoint() succeeded")
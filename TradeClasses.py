@@ -35,17 +35,25 @@ class ItemListing:
 
 	def updateMaxQuantity(self, newQuantity):
 		self.maxQuantity = utils.truncateFloat(newQuantity, self.quantPercision)
+		#Keep listingStr in sync with the listing's fields. The hash stays the same, since this is still the same listing
+		self.listingStr = "ItemListing_{}(seller={}, item={}, price={}, max={})".format(self.hash, self.sellerId, self.itemId, self.unitPrice, newQuantity)
 
 	def __str__(self):
 		return self.listingStr
 
 
 class ItemContainer:
+	__slots__ = ("id", "quantPercision", "quantity")  #Agents create these for every inventory entry and transfer, so skip the per-instance __dict__
+
 	def __init__(self, itemId, itemQuantity):
 		self.id = itemId
 		self.quantPercision = g_ItemQuantityPercision
 		self.quantity = utils.truncateFloat(itemQuantity, self.quantPercision)
 
+	def __setstate__(self, state):
+		#Pickles from before __slots__ was added hold a plain dict
+		utils.setSlotState(self, state)
+
 	def __repr__(self):
 		return str(self)
 
@@ -53,68 +61,54 @@ class ItemContainer:
 		return "ItemContainer(ID={}, Quant={})".format(self.id, self.quantity)
 
 	def __add__(self, other):
-		typeOther = type(other)
-		if (typeOther == type(self)):
-			otherId = other.id
-			if (self.id != otherId):
-				raise ValueError("Cannot add inventory entries of different items {} and {}".format(self.id, otherId))
-
-			newEntry = ItemContainer(self.id, self.quantity+other.quantity)
-			return newEntry
-		elif ((typeOther == int) or (typeOther == float)):
-			newEntry = ItemContainer(self.id, self.quantity+other)
-			return newEntry
+		itemId = self.id
+		if (isinstance(other, ItemContainer)):
+			if (itemId != other.id):
+				raise ValueError("Cannot add inventory entries of different items {} and {}".format(itemId, other.id))
+
+			return ItemContainer(itemId, self.quantity+other.quantity)
+		elif (isinstance(other, (int, float))):
+			return ItemContainer(itemId, self.quantity+other)
 		else:
-			raise ValueError("Cannot add {} and {}".format(typeOther, type(self)))
+			raise ValueError("Cannot add {} and {}".format(type(other), type(self)))
 
 	def __sub__(self, other):
-		typeOther = type(other)
-		if (typeOther == type(self)):
-			otherId = other.id
-			if (self.id != otherId):
-				raise ValueError("Cannot add inventory entries of different items {} and {}".format(self.id, otherId))
-
-			newEntry = ItemContainer(self.id, self.quantity-other.quantity)
-			return newEntry
-		elif ((typeOther == int) or (typeOther == float)):
-			newEntry = ItemContainer(self.id, self.quantity-other)
-			return newEntry
+		itemId = self.id
+		if (isinstance(other, ItemContainer)):
+			if (itemId != other.id):
+				raise ValueError("Cannot add inventory entries of different items {} and {}".format(itemId, other.id))
+
+			return ItemContainer(itemId, self.quantity-other.quantity)
+		elif (isinstance(other, (int, float))):
+			return ItemContainer(itemId, self.quantity-other)
 		else:
-			raise ValueError("Cannot subtract {} and {}".format(typeOther, type(self)))
+			raise ValueError("Cannot subtract {} and {}".format(type(other), type(self)))
 
 	def __iadd__(self, other):
-		typeOther = type(other)
-		if (typeOther == type(self)):
-			otherId = other.id
-			if (self.id != otherId):
-				raise ValueError("Cannot add inventory entries of different items {} and {}".format(self.id, otherId))
-
-			self.quantity += other.quantity
-			self.quantity = utils.truncateFloat(self.quantity, self.quantPercision)
+		if (isinstance(other, ItemContainer)):
+			if (self.id != other.id):
+				raise ValueError("Cannot add inventory entries of different items {} and {}".format(self.id, other.id))
+
+			self.quantity = utils.truncateFloat(self.quantity+other.quantity, self.quantPercision)
 			return self
-		elif ((typeOther == int) or (typeOther == float)):
-			self.quantity += other
-			self.quantity = utils.truncateFloat(self.quantity, self.quantPercision)
+		elif (isinstance(other, (int, float))):
+			self.quantity = utils.truncateFloat(self.quantity+other, self.quantPercision)
 			return self
 		else:
-			raise ValueError("Cannot add {} and {}".format(typeOther, type(self)))
+			raise ValueError("Cannot add {} and {}".format(type(other), type(self)))
 
 	def __isub__(self, other):
-		typeOther = type(other)
-		if (typeOther == type(self)):
-			otherId = other.id
-			if (self.id != otherId):
-				raise ValueError("Cannot subtract inventory entries of different items {} and {}".format(self.id, otherId))
-
-			self.quantity -= other.quantity
-			self.quantity = utils.truncateFloat(self.quantity, self.quantPercision)
+		if (isinstance(other, ItemContainer)):
+			if (self.id != other.id):
+				raise ValueError("Cannot subtract inventory entries of different items {} and {}".format(self.id, other.id))
+
+			self.quantity = utils.truncateFloat(self.quantity-other.quantity, self.quantPercision)
 			return self
-		elif ((typeOther == int) or (typeOther == float)):
-			self.quantity -= other
-			self.quantity = utils.truncateFloat(self.quantity, self.quantPercision)
+		elif (isinstance(other, (int, float))):
+			self.quantity = utils.truncateFloat(self.quantity-other, self.quantPercision)
 			return self
 		else:
-			raise ValueError("Cannot subtract {} and {}".format(typeOther, type(self)))
+			raise ValueError("Cannot subtract {} and {}".format(type(other), type(self)))
 
 
 class LaborListing:
@@ -165,9 +159,9 @@ class TradeRequest:
 		self.currencyAmount = int(currencyAmount)
 		self.itemPackage = itemPackage
 
-		reqString = "TradeReq(seller={}, buyerId={}, currency={}, item={})_{}".format(sellerId, buyerId, self.currencyAmount, itemPackage, time.time())
+		reqString = "TradeReq(seller={}, buyerId={}, currency={}, item={})_{}".format(sellerId, buyerId, self.currencyAmount, itemPackage, time.monotonic_ns())
 
-		self.hash = hashlib.sha256(reqString.encode('utf-8')).hexdigest()[:8 ]
+		self.hash = hashlib.blake2b(reqString.encode('utf-8'), digest_size=4).hexdigest()  #Only used to tell requests apart, so it doesn't need sha256
 		self.reqId = "TradeReq_{}(seller={}, buyerId={}, currency={}, item={})".format(self.hash, sellerId, buyerId, self.currencyAmount, itemPackage)
 
 	def __str__(self):
@@ -197,9 +191,9 @@ class LandTradeRequest:
 		self.allocation = allocation
 		self.currencyAmount = int(currencyAmount)
 
-		reqString = "LandTradeReq(seller={}, buyerId={}, hectares={}, allocation={}, currency={})_{}".format(sellerId, buyerId, hectares, allocation, self.currencyAmount, time.time())
+		reqString = "LandTradeReq(seller={}, buyerId={}, hectares={}, allocation={}, currency={})_{}".format(sellerId, buyerId, hectares, allocation, self.currencyAmount, time.monotonic_ns())
 
-		self.hash = hashlib.sha256(reqString.encode('utf-8')).hexdigest()[:8 ]
+		self.hash = hashlib.blake2b(reqString.encode('utf-8'), digest_size=4).hexdigest()  #Only used to tell requests apart, so it doesn't need sha256
 		self.reqId = "LandTradeReq_{}(seller={}, buyerId={}, hectares={}, allocation={}, currency={})".format(self.hash, sellerId, buyerId, hectares, allocation, self.currencyAmount)
 
 	def __str__(self):
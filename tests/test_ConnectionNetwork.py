@@ -0,0 +1,99 @@
+import os
+import sys
+import logging
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ConnectionNetwork import ConnectionNetwork
+from NetworkClasses import *
+
+
+class FakeRecvPipe:
+	def __init__(self, packets):
+		self.packets = list(packets)
+
+	def recv(self):
+		return self.packets.pop(0)
+
+
+class FakeSendPipe:
+	def __init__(self, pipeId, sentPackets):
+		self.pipeId = pipeId
+		self.sentPackets = sentPackets
+
+	def send(self, packet):
+		self.sentPackets.append((self.pipeId, packet))
+
+
+def getTestNetwork(agentIds, sentPackets):
+	'''
+	Returns a ConnectionNetwork with fake agent links, skipping the marketplaces and statistics gatherer that __init__ spins up
+	'''
+	network = ConnectionNetwork.__new__(ConnectionNetwork)
+	network.id = "ConnectionNetwork"
+	network.logger = logging.getLogger("test_ConnectionNetwork")
+	network.debugLogging = False
+	network.lockTimeout = 10
+	network.agentConnections = {}
+	network.agentConnectionsLock = threading.Lock()
+	network.sendLocks = {}
+	network.batchConnections = set()
+	network.snoopDict = {}
+	network.snoopDictLock = threading.Lock()
+	network.timeTickBlockers = {}
+	network.timeTickBlockers_Lock = threading.Lock()
+	network.spawnedThreads = []
+
+	for agentId in agentIds:
+		network.addConnection(agentId, Link(sendPipe=FakeSendPipe(agentId, sentPackets), recvPipe=None), acceptsBatches=True)
+
+	return network
+
+
+class TestRouteBatch(unittest.TestCase):
+	def routeBatch(self, batchPayload):
+		'''
+		Runs monitorLink on agent A's link for a single BATCH packet, followed by a KILL_PIPE_NETWORK so the monitor returns. Returns the packets sent out by the network
+		'''
+		sentPackets = []
+		network = getTestNetwork(["A", "B"], sentPackets)
+
+		batchPacket = NetworkPacket(senderId="A", msgType=PACKET_TYPE.BATCH, payload=batchPayload)
+		killPacket = NetworkPacket(senderId="A", msgType=PACKET_TYPE.KILL_PIPE_NETWORK)
+		network.agentConnections["A"].recvPipe = FakeRecvPipe([batchPacket, killPacket])
+		network.monitorLink("A")
+
+		return sentPackets
+
+	def test_mixedBatchIsRoutedInOrder(self):
+		firstPacket = NetworkPacket(senderId="A", destinationId="B", msgType=PACKET_TYPE.CURRENCY_TRANSFER, transactionId="first")
+		tickBlockedPacket = NetworkPacket(senderId="A", msgType=PACKET_TYPE.TICK_BLOCKED, transactionId="tickBlocked")
+		secondPacket = NetworkPacket(senderId="A", destinationId="B", msgType=PACKET_TYPE.CURRENCY_TRANSFER, transactionId="second")
+
+		sentPackets = self.routeBatch([firstPacket, tickBlockedPacket, secondPacket])
+
+		self.assertEqual(len(sentPackets), 3)
+		self.assertEqual(sentPackets[0], ("B", firstPacket))
+		self.assertEqual(sentPackets[1][0], "A")
+		self.assertEqual(sentPackets[1][1].msgType, PACKET_TYPE.TICK_BLOCKED_ACK)
+		self.assertEqual(sentPackets[1][1].transactionId, "tickBlocked")
+		self.assertEqual(sentPackets[2], ("B", secondPacket))
+
+	def test_packetsAroundNetworkPacketAreStillBatched(self):
+		agentPackets = [NetworkPacket(senderId="A", destinationId="B", msgType=PACKET_TYPE.CURRENCY_TRANSFER, transactionId=i) for i in range(4)]
+		tickBlockedPacket = NetworkPacket(senderId="A", msgType=PACKET_TYPE.TICK_BLOCKED, transactionId="tickBlocked")
+
+		sentPackets = self.routeBatch(agentPackets[:2] + [tickBlockedPacket] + agentPackets[2:])
+
+		self.assertEqual([pipeId for pipeId, packet in sentPackets], ["B", "A", "B"])
+		self.assertEqual(sentPackets[0][1].msgType, PACKET_TYPE.BATCH)
+		self.assertEqual(sentPackets[0][1].payload, agentPackets[:2])
+		self.assertEqual(sentPackets[1][1].msgType, PACKET_TYPE.TICK_BLOCKED_ACK)
+		self.assertEqual(sentPackets[2][1].msgType, PACKET_TYPE.BATCH)
+		self.assertEqual(sentPackets[2][1].payload, agentPackets[2:])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,184 @@
+import os
+import sys
+import logging
+import pickle
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EconAgent import Agent, AgentInfo, UtilityFunction
+from TradeClasses import *
+
+
+def getTestEmployer(currencyBalance, paymentSent=True):
+	'''
+	Returns an employer Agent with only the state labor contract fulfillment needs, skipping the utility sampling and network setup that __init__ does.
+	sendCurrency is replaced with a stub that returns paymentSent
+	'''
+	agent = Agent.__new__(Agent)
+	agent.agentId = "employer"
+	agent.stepNum = 0
+	agent.logger = logging.getLogger("test_EconAgent")
+	agent.debugLogging = False
+	agent.currencyBalance = currencyBalance
+	agent.laborExpenseTracking = True
+	agent.laborExpenseLock = threading.Lock()
+	agent.stepLaborExpense = 0
+	agent.totalLaborExpense = 0
+
+	agent.sentPayments = []
+	def sendCurrency(cents, recipientId, transactionId=None):
+		agent.sentPayments.append((cents, recipientId))
+		return paymentSent
+	agent.sendCurrency = sendCurrency
+
+	agent.cancelledContracts = []
+	agent.cancelLaborContract = agent.cancelledContracts.append
+
+	return agent
+
+
+class TestUtilityFunction(unittest.TestCase):
+	def test_fromParams(self):
+		utilityFunction = UtilityFunction.fromParams(100, 0.5)
+
+		self.assertEqual(utilityFunction.baseUtility, 100)
+		self.assertEqual(utilityFunction.diminishingFactor, 0.5)
+		self.assertAlmostEqual(utilityFunction.getMarginalUtility(3), 50)
+		self.assertAlmostEqual(utilityFunction.getTotalUtility(4), 300)
+
+	def test_pickleRoundTrip(self):
+		utilityFunction = UtilityFunction.fromParams(100, 0.5)
+		utilityFunction.getMarginalUtility(3)
+
+		loadedFunction = pickle.loads(pickle.dumps(utilityFunction))
+
+		self.assertEqual(loadedFunction.baseUtility, 100)
+		self.assertEqual(loadedFunction.diminishingFactor, 0.5)
+		self.assertEqual(loadedFunction.marginalUtilityCache, {})
+		self.assertAlmostEqual(loadedFunction.getTotalUtility(4), 300)
+
+	def test_setstateFromOldDictState(self):
+		#Pickles from before __slots__ hold a plain __dict__ with only B and D
+		loadedFunction = UtilityFunction.__new__(UtilityFunction)
+		loadedFunction.__setstate__({"baseUtility": 100, "diminishingFactor": 0.5})
+
+		self.assertAlmostEqual(loadedFunction.getMarginalUtility(3), 50)
+		self.assertAlmostEqual(loadedFunction.getTotalUtility(4), 300)
+
+
+class TestMarginalUtilities(unittest.TestCase):
+	def getTestAgent(self, utilityFunctions):
+		agent = Agent.__new__(Agent)
+		agent.inventory = {}
+		agent.enableNutrition = False
+		agent.utilityFunctions = utilityFunctions
+		agent.updateUtilityArrays()
+		return agent
+
+	def test_matchesScalarMarginalUtility(self):
+		agent = self.getTestAgent({"apple": UtilityFunction.fromParams(100, 0.5), "potato": UtilityFunction.fromParams(30, 1)})
+		agent.inventory["apple"] = ItemContainer("apple", 3)
+
+		marginalUtilities = agent.getMarginalUtilities(["potato", "apple"])
+
+		self.assertAlmostEqual(marginalUtilities[0], agent.getMarginalUtility("potato"))
+		self.assertAlmostEqual(marginalUtilities[1], agent.getMarginalUtility("apple"))
+
+	def test_replacedUtilityFunctions(self):
+		agent = self.getTestAgent({"apple": UtilityFunction.fromParams(100, 0.5)})
+		agent.utilityFunctions = {"potato": UtilityFunction.fromParams(30, 1), "apple": UtilityFunction.fromParams(60, 0.5)}
+
+		marginalUtilities = agent.getMarginalUtilities(["apple", "potato"])
+
+		self.assertAlmostEqual(marginalUtilities[0], 60/pow(2, 0.5))
+		self.assertAlmostEqual(marginalUtilities[1], 15)
+
+
+class TestAgentInfo(unittest.TestCase):
+	def test_pickleRoundTrip(self):
+		loadedInfo = pickle.loads(pickle.dumps(AgentInfo("agent1", "TestBuyer")))
+
+		self.assertEqual(loadedInfo.agentId, "agent1")
+		self.assertEqual(loadedInfo.agentType, "TestBuyer")
+
+	def test_setstateFromOldDictState(self):
+		#Pickles from before __slots__ hold a plain __dict__
+		loadedInfo = AgentInfo.__new__(AgentInfo)
+		loadedInfo.__setstate__({"agentId": "agent1", "agentType": "TestBuyer"})
+
+		self.assertEqual(str(loadedInfo), "AgentInfo(ID=agent1, Type=TestBuyer)")
+
+
+class TestCurrencyTransfers(unittest.TestCase):
+	def getTestAgent(self, currencyBalance):
+		agent = Agent.__new__(Agent)
+		agent.agentId = "agent"
+		agent.logger = logging.getLogger("test_EconAgent")
+		agent.debugLogging = False
+		agent.currencyBalance = currencyBalance
+		agent.currencyBalanceLock = threading.Lock()
+		agent.lockTimeout = 5
+		agent.needCurrencyTransferAck = False
+		agent.currencyInflowTracking = False
+		agent.laborIncomeTracking = False
+		return agent
+
+	def test_sendCurrencyRejectsInvalidAmounts(self):
+		agent = self.getTestAgent(currencyBalance=1000)
+
+		with self.assertLogs("test_EconAgent", level="ERROR") as logs:
+			self.assertFalse(agent.sendCurrency(0.5, "seller"))
+			self.assertFalse(agent.sendCurrency(-0.5, "seller"))
+			self.assertFalse(agent.sendCurrency(-100, "seller"))
+
+		self.assertIn("sendCurrency(0.5, seller) failed", logs.output[0])
+		self.assertEqual(agent.currencyBalance, 1000)
+
+	def test_receiveCurrencyRejectsNegativeAmounts(self):
+		agent = self.getTestAgent(currencyBalance=1000)
+
+		self.assertFalse(agent.receiveCurrency(-0.5))
+		self.assertTrue(agent.receiveCurrency(0.5))
+		self.assertTrue(agent.receiveCurrency(100.7))
+		self.assertEqual(agent.currencyBalance, 1100)
+
+
+class TestFulfillLaborContract(unittest.TestCase):
+	def setUp(self):
+		self.laborContract = LaborContract(employerId="employer", workerId="worker", ticksPerStep=8, wagePerTick=150, workerSkillLevel=0.5, contractLength=10, startStep=0, endStep=9)
+
+	def test_employerRecordsLaborExpense(self):
+		agent = getTestEmployer(currencyBalance=10000)
+
+		contractFulfilled = agent.fulfillLaborContract(self.laborContract)
+
+		self.assertTrue(contractFulfilled)
+		self.assertEqual(agent.sentPayments, [(1200, "worker")])
+		self.assertEqual(agent.stepLaborExpense, 1200)
+		self.assertEqual(agent.totalLaborExpense, 1200)
+
+	def test_failedPaymentIsStillAnExpense(self):
+		agent = getTestEmployer(currencyBalance=10000, paymentSent=False)
+
+		contractFulfilled = agent.fulfillLaborContract(self.laborContract)
+
+		self.assertFalse(contractFulfilled)
+		self.assertEqual(agent.stepLaborExpense, 1200)
+		self.assertEqual(agent.totalLaborExpense, 1200)
+
+	def test_cancelledContractIsNotAnExpense(self):
+		agent = getTestEmployer(currencyBalance=1000)
+
+		contractFulfilled = agent.fulfillLaborContract(self.laborContract)
+
+		self.assertFalse(contractFulfilled)
+		self.assertEqual(agent.cancelledContracts, [self.laborContract])
+		self.assertEqual(agent.sentPayments, [])
+		self.assertEqual(agent.stepLaborExpense, 0)
+		self.assertEqual(agent.totalLaborExpense, 0)
+
+
+if __name__ == '__main__':
+	unittest.main()
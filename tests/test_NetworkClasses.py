@@ -0,0 +1,33 @@
+import os
+import sys
+import pickle
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NetworkClasses import *
+
+
+class TestNetworkPacket(unittest.TestCase):
+	def test_hashIgnoresPayload(self):
+		payload = {"ticks": 8}
+		packet = NetworkPacket(senderId="A", destinationId="B", msgType=PACKET_TYPE.LABOR_TIME_SEND, payload=payload, transactionId="labor")
+		samePacket = pickle.loads(pickle.dumps(packet))
+
+		#Change the payload after the packet was built. The hash only covers the header, so both packets print the same
+		payload["ticks"] = 0
+
+		self.assertEqual(str(packet), str(samePacket))
+
+	def test_hashSurvivesPickle(self):
+		packet = NetworkPacket(senderId="A", destinationId="B", msgType=PACKET_TYPE.CURRENCY_TRANSFER, payload=100, transactionId="payment")
+		packetStr = str(packet)
+
+		loadedPacket = pickle.loads(pickle.dumps(packet))
+
+		self.assertEqual(str(loadedPacket), packetStr)
+		self.assertEqual(loadedPacket.hash, packet.hash)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,30 @@
+import os
+import sys
+import pickle
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from TradeClasses import *
+
+
+class TestItemContainer(unittest.TestCase):
+	def test_pickleRoundTrip(self):
+		itemContainer = ItemContainer("apple", 2.5)
+
+		loadedContainer = pickle.loads(pickle.dumps(itemContainer))
+
+		self.assertEqual(loadedContainer.id, "apple")
+		self.assertEqual(loadedContainer.quantity, 2.5)
+		self.assertEqual(loadedContainer.quantPercision, itemContainer.quantPercision)
+
+	def test_setstateFromOldDictState(self):
+		#Pickles from before __slots__ hold a plain __dict__
+		loadedContainer = ItemContainer.__new__(ItemContainer)
+		loadedContainer.__setstate__({"id": "apple", "quantPercision": g_ItemQuantityPercision, "quantity": 2.5})
+
+		self.assertEqual(str(loadedContainer + ItemContainer("apple", 1)), str(ItemContainer("apple", 3.5)))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -82,6 +82,9 @@ def getLogger(name, console="WARNING", outputdir="LOGS", logFile=True, fileLevel
 		logger.addHandler(fh)
 	logger.addHandler(ch)
 
+	#Only let the logger create records that at least one handler will emit. This lets logger.isEnabledFor() skip disabled levels
+	logger.setLevel(min([handler.level for handler in logger.handlers]))
+
 	return logger
 
 
@@ -96,6 +99,21 @@ def getNormalSample(mean, std, onlyPositive=True):
 	return sample
 
 
+def getNormalSamples(means, stds, onlyPositive=True):
+	'''
+	Returns an array with one sample from each of the normal distributions described by means and stds
+	'''
+	means = np.asarray(means, dtype=float)
+	stds = np.asarray(stds, dtype=float)
+	samples = np.random.normal(means, stds)
+	if (onlyPositive):
+		negativeMask = samples < 0
+		while (negativeMask.any()):
+			samples[negativeMask] = np.random.normal(means[negativeMask], stds[negativeMask])
+			negativeMask = samples < 0
+	return samples
+
+
 def getTimeStamp(sanitize=True):
 	date_time = datetime.now()
 	timeStamp = date_time.strftime("%m/%d/%Y %H:%M:%S")
@@ -118,6 +136,30 @@ def truncateFloat(value, percision):
 	return truncatedFloat
 
 
+def getPickledStateDict(state):
+	'''
+	Returns the attributes of a pickled object's state as a single dict.
+	Pickles of classes without __slots__ store a plain dict, while classes with __slots__ store a (dictState, slotState) tuple
+	'''
+	if (isinstance(state, tuple)):
+		dictState, slotState = state
+		state = {}
+		if (dictState):
+			state.update(dictState)
+		if (slotState):
+			state.update(slotState)
+
+	return state
+
+
+def setSlotState(obj, state):
+	'''
+	Restores a pickled state onto an object with __slots__. Accepts the plain dict state of pickles made before the class had __slots__
+	'''
+	for attributeName, value in getPickledStateDict(state).items():
+		setattr(obj, attributeName, value)
+
+
 def loadItemDict(itemDir):
 	allItemsDict = {}
 	for fileName in os.listdir(itemDir):